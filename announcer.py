@@ -0,0 +1,260 @@
+import asyncio
+from collections import deque
+import logging
+
+logger = logging.getLogger("AoCBot")
+
+DISCORD_MESSAGE_LIMIT = 2000
+
+# Discord allows roughly 5 messages per 5 seconds per channel
+CHANNEL_RATE = 1.0  # tokens per second
+CHANNEL_BURST = 5
+
+RETRY_DELAY = 5
+MAX_RETRY_DELAY = 300
+
+# Sent summary messages remembered so they can be edited
+MAX_EDITABLE_MESSAGES = 100
+
+
+def pack_messages(lines, limit=DISCORD_MESSAGE_LIMIT):
+    """Pack lines, in order, into as few messages of at most limit chars as possible"""
+    messages = []
+    current = ""
+
+    for line in lines:
+        # Split lines that could never fit into a single message
+        while len(line) > limit:
+            if current:
+                messages.append(current)
+                current = ""
+            messages.append(line[:limit])
+            line = line[limit:]
+
+        if not current:
+            current = line
+        elif len(current) + 1 + len(line) <= limit:
+            current = f"{current}\n{line}"
+        else:
+            messages.append(current)
+            current = line
+
+    if current:
+        messages.append(current)
+    return messages
+
+
+def is_permanent_failure(error):
+    """Whether retrying a send can never succeed
+
+    Covers discord.Forbidden (403), discord.NotFound (404) and other 4xx
+    HTTPExceptions such as 400 content too long, but not 429 rate limits.
+    Checked by status so this module does not need to import discord.
+    """
+    status = getattr(error, "status", None)
+    return isinstance(status, int) and 400 <= status < 500 and status != 429
+
+
+class TokenBucket:
+    """Token bucket used to pace sends to a single channel"""
+
+    def __init__(self, rate=CHANNEL_RATE, capacity=CHANNEL_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = None
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            if self.updated is not None:
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AnnouncementQueue:
+    """Outbound announcement queue drained by its own worker task
+
+    Queued lines are packed into as few messages as possible per channel
+    and paced per channel with a token bucket. Undelivered lines are kept
+    in the state store so they survive a restart.
+
+    Keyed messages (see put_message) are sent once and then edited in place
+    with edit(channel_id, message_id, content); queuing a key that is still
+    pending just replaces its content. send and edit return the message
+    showing the content, or None.
+    """
+
+    def __init__(self, send, store, name="pending_announcements", edit=None):
+        self.send = send
+        self.edit = edit
+        self.store = store
+        self.name = name
+        self._pending = deque(self._load())
+        self._message_ids = {}
+        self._retry_at = {}
+        self._retry_delays = {}
+        self._buckets = {}
+        self._wakeup = asyncio.Event()
+        self._worker = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def _load(self):
+        return [tuple(item) for item in self.store.load(self.name, [])]
+
+    def _save(self):
+        self.store.save(self.name, list(self._pending))
+
+    def put(self, channel_id, lines):
+        """Queue announcement lines for a channel"""
+        if not lines:
+            return
+        self._pending.extend((channel_id, line) for line in lines)
+        self._save()
+        self._wakeup.set()
+
+    def put_message(self, channel_id, key, content):
+        """Queue a message that replaces any earlier message with the same key"""
+        for i, item in enumerate(self._pending):
+            if len(item) == 3 and item[2] == key:
+                self._pending[i] = (channel_id, content, key)
+                break
+        else:
+            self._pending.append((channel_id, content, key))
+        self._save()
+        self._wakeup.set()
+
+    def start(self):
+        """Start the worker task"""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+            if self._pending:
+                logger.info(f"Resuming {len(self._pending)} undelivered announcement(s)")
+                self._wakeup.set()
+
+    async def stop(self):
+        """Stop the worker task, keeping undelivered lines in the state store"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._save()
+
+    def _next_batch(self, now):
+        """Return the channel of the oldest sendable line and the lines to pack with it
+
+        Channels backing off after a failed send are skipped. A keyed
+        message is never packed with other lines. Returns None if nothing
+        can be sent now.
+        """
+        channel_id = next(
+            (item[0] for item in self._pending if self._retry_at.get(item[0], 0) <= now),
+            None,
+        )
+        if channel_id is None:
+            return None
+
+        lines = []
+        length = -1
+        for item in self._pending:
+            if item[0] != channel_id:
+                continue
+            if len(item) == 3 or (lines and length + 1 + len(item[1]) > DISCORD_MESSAGE_LIMIT):
+                break
+            lines.append(item[1])
+            length += 1 + len(item[1])
+        return channel_id, lines
+
+    def _next_retry(self):
+        """Earliest time a backing-off channel with queued lines may send again"""
+        channels = {item[0] for item in self._pending}
+        times = [at for channel_id, at in self._retry_at.items() if channel_id in channels]
+        return min(times, default=None)
+
+    async def _deliver_keyed(self, channel_id, content, key):
+        """Edit the message sent for a key, or send it if there is none yet"""
+        message_id = self._message_ids.get(key)
+        if message_id is not None and self.edit is not None:
+            # Returns the message now showing the content, which may be a new one
+            message = await self.edit(channel_id, message_id, content)
+        else:
+            message = await self.send(channel_id, content)
+        if message is not None:
+            self._message_ids[key] = message.id
+            if len(self._message_ids) > MAX_EDITABLE_MESSAGES:
+                del self._message_ids[next(iter(self._message_ids))]
+
+    def _remove(self, channel_id, count):
+        """Remove the first count lines queued for a channel"""
+        kept = deque()
+        for item in self._pending:
+            if count and item[0] == channel_id:
+                count -= 1
+            else:
+                kept.append(item)
+        self._pending = kept
+        self._save()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = self._next_batch(loop.time()) if self._pending else None
+            if batch is None:
+                # Wait for new lines, or until a backing-off channel may retry
+                retry_at = self._next_retry()
+                timeout = None if retry_at is None else max(0, retry_at - loop.time())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            channel_id, lines = batch
+            bucket = self._buckets.setdefault(channel_id, TokenBucket())
+            await bucket.acquire()
+
+            item = None
+            try:
+                if lines:
+                    for content in pack_messages(lines):
+                        await self.send(channel_id, content)
+                else:
+                    # Read the keyed message now, it may have been replaced while waiting
+                    item = next(item for item in self._pending if item[0] == channel_id)
+                    await self._deliver_keyed(*item)
+            except Exception as e:
+                if not is_permanent_failure(e):
+                    # Only this channel waits; others keep being served
+                    delay = self._retry_delays.get(channel_id, RETRY_DELAY)
+                    self._retry_at[channel_id] = loop.time() + delay
+                    self._retry_delays[channel_id] = min(delay * 2, MAX_RETRY_DELAY)
+                    logger.error(
+                        f"❌ Failed to send announcement to {channel_id}, retrying in {delay}s: {e}"
+                    )
+                    continue
+                logger.error(
+                    f"❌ Dropping {len(lines) or 1} announcement(s) for {channel_id}, "
+                    f"sending can never succeed: {e}"
+                )
+
+            self._retry_at.pop(channel_id, None)
+            self._retry_delays.pop(channel_id, None)
+            if lines:
+                self._remove(channel_id, len(lines))
+            elif item in self._pending:
+                # Content replaced during delivery stays queued as an edit
+                self._pending.remove(item)
+                self._save()
@@ -0,0 +1,166 @@
+"""Benchmark the leaderboard module against synthetic payloads
+
+Measures parse, diff, render and end-to-end poll time (fetch from a local
+stub server standing in for adventofcode.com, then diff) for boards of
+10 to 10,000 members, and writes the results as JSON so runs from
+different commits can be compared.
+
+    python benchmarks/bench_leaderboard.py --output bench.json
+    python benchmarks/bench_leaderboard.py --sizes 10 100 --repeat 3
+"""
+import argparse
+import asyncio
+import copy
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.stub_server import start_stub_server  # noqa: E402
+from benchmarks.synthetic import add_star, generate_leaderboard  # noqa: E402
+from leaderboard import AoCLeaderboard, parse_leaderboard  # noqa: E402
+from model import Leaderboard  # noqa: E402
+from star_index import StarIndex  # noqa: E402
+from state_store import JsonStateStore  # noqa: E402
+from stats import LeaderboardStats  # noqa: E402
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+COMPLETIONS = {"partial": 0.4, "full": 1.0}
+
+
+def measure(func, repeat, setup=None):
+    """Run func repeat times and return timing stats in milliseconds
+
+    If setup is given, its result is passed to func and its own time is
+    not measured.
+    """
+    timings = []
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"min_ms": min(timings), "median_ms": statistics.median(timings)}
+
+
+def next_payload(payload):
+    """Return a copy of payload in which one member earned one more star"""
+    changed = copy.deepcopy(payload)
+    for member_id, member in changed["members"].items():
+        for day in range(1, 26):
+            parts = member["completion_day_level"].get(str(day), {})
+            for part in ("1", "2"):
+                if part not in parts:
+                    add_star(changed, member_id, day, int(part), member["last_star_ts"] + 60)
+                    return changed
+    return changed
+
+
+async def measure_poll(body, repeat, state_dir):
+    """Time fetching from the stub server and diffing the result"""
+    from aiohttp import web
+
+    async def handler(request):
+        return web.Response(body=body, content_type="application/json")
+
+    runner, url = await start_stub_server(handler)
+    store = JsonStateStore(state_dir)
+    client = AoCLeaderboard("bench", "0", 2023, store=store)
+    client.LEADERBOARD_URL = url
+    index = StarIndex(baseline=0)
+    timings = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data = await client.fetch_data(force_fresh=True)
+            client.check_for_new_stars(data, index)
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        await client.close()
+        await store.close()
+        await runner.cleanup()
+    return {"min_ms": min(timings), "median_ms": statistics.median(timings)}
+
+
+def bench_case(members, completion, repeat, state_dir):
+    payload = generate_leaderboard(members, completion=COMPLETIONS[completion])
+    body = json.dumps(payload).encode()
+    model = Leaderboard.from_json(payload)
+    changed = Leaderboard.from_json(next_payload(payload))
+    client = AoCLeaderboard("bench", "0", 2023, store=JsonStateStore(state_dir))
+
+    # Steady state: only one member changed since the previous poll
+    seen = StarIndex(baseline=0)
+    client.check_for_new_stars(model, seen)
+    state = seen.to_dict()
+
+    return {
+        "members": members,
+        "completion": completion,
+        "payload_bytes": len(body),
+        "stars": sum(member.stars for member in model.members),
+        "parse": measure(lambda: parse_leaderboard(body), repeat),
+        "diff_first_poll": measure(
+            lambda index: client.check_for_new_stars(model, index),
+            repeat,
+            setup=lambda: StarIndex(baseline=0),
+        ),
+        "diff_steady_state": measure(
+            lambda index: client.check_for_new_stars(changed, index),
+            repeat,
+            setup=lambda: StarIndex.from_dict(state),
+        ),
+        "render": measure(lambda: client._render_leaderboard(model, 25), repeat),
+        "stats": measure(lambda: LeaderboardStats(model, 2023), repeat),
+        "poll_end_to_end": asyncio.run(measure_poll(body, repeat, state_dir)),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "timestamp": int(time.time()),
+        "cases": [],
+    }
+    with tempfile.TemporaryDirectory() as state_dir:
+        for members in args.sizes:
+            for completion in COMPLETIONS:
+                case = bench_case(members, completion, args.repeat, state_dir)
+                results["cases"].append(case)
+                print(
+                    f"{members:>6} members {completion:>7}: "
+                    + " ".join(
+                        f"{step}={case[step]['median_ms']:.2f}ms"
+                        for step in ("parse", "diff_first_poll", "diff_steady_state", "render", "stats", "poll_end_to_end")
+                    )
+                )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""Local stand-in for adventofcode.com, shared by tests and benchmarks"""
+
+
+async def start_stub_server(handler):
+    """Serve handler at /leaderboard.json on a random local port
+
+    Returns the aiohttp runner, to clean up when done, and the URL.
+    """
+    from aiohttp import web
+
+    app = web.Application()
+    app.router.add_get("/leaderboard.json", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/leaderboard.json"
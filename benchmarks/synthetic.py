@@ -0,0 +1,67 @@
+"""Synthetic AoC private leaderboard payloads for benchmarks"""
+import random
+
+from model import unlock_ts
+
+
+def generate_leaderboard(members, days=25, completion=1.0, year=2023, seed=0):
+    """Generate a leaderboard payload shaped like the AoC JSON API
+
+    members: number of members
+    days: number of unlocked days
+    completion: average share of unlocked days a member keeps solving for
+        before dropping out (1.0 means everyone solves everything)
+
+    Part 1 solve times are log-normal around ~40 minutes after unlock and
+    part 2 follows ~15 minutes later, with a long tail of late solvers.
+    """
+    rng = random.Random(seed)
+    payload_members = {}
+
+    for i in range(members):
+        member_id = str(100000 + i)
+        if completion >= 1.0:
+            last_day = days
+        else:
+            last_day = min(days, int(rng.expovariate(1 / max(completion * days, 0.1))))
+
+        completion_day_level = {}
+        stars = 0
+        last_star_ts = 0
+        for day in range(1, last_day + 1):
+            part1 = unlock_ts(year, day) + int(rng.lognormvariate(7.8, 1.2))
+            parts = {"1": {"get_star_ts": part1, "star_index": stars}}
+            stars += 1
+            last_star_ts = max(last_star_ts, part1)
+
+            # Most members who solve part 1 also solve part 2
+            if rng.random() < 0.85:
+                part2 = part1 + int(rng.lognormvariate(6.8, 1.3))
+                parts["2"] = {"get_star_ts": part2, "star_index": stars}
+                stars += 1
+                last_star_ts = max(last_star_ts, part2)
+
+            completion_day_level[str(day)] = parts
+
+        payload_members[member_id] = {
+            "id": int(member_id),
+            "name": None if rng.random() < 0.05 else f"Member {i}",
+            "stars": stars,
+            "local_score": 0,
+            "global_score": 0,
+            "last_star_ts": last_star_ts,
+            "completion_day_level": completion_day_level,
+        }
+
+    return {"event": str(year), "owner_id": 100000, "members": payload_members}
+
+
+def add_star(payload, member_id, day, part, ts):
+    """Give a member one more star, as a later poll would see it"""
+    member = payload["members"][member_id]
+    member["completion_day_level"].setdefault(str(day), {})[str(part)] = {
+        "get_star_ts": ts,
+        "star_index": member["stars"],
+    }
+    member["stars"] += 1
+    member["last_star_ts"] = max(member["last_star_ts"], ts)
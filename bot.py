@@ -21,7 +21,21 @@ import aiohttp
 import json
 import os
 
-from leaderboard import AoCLeaderboard
+from leaderboard import AoCLeaderboard, cache_name_for, create_session
+from leaderboard_view import LeaderboardView
+from metrics import metrics
+from announcer import AnnouncementQueue
+from cluster import FOLLOWER_CHECK_INTERVAL, LeaderElection
+from command_sync import CommandSyncer
+from digest import AnnouncementDigest
+from history import LeaderboardHistory
+from model import UNLOCK_TZ
+from polling import AdaptivePollPolicy
+from scheduler import Board, PollFailed, PollScheduler
+from state_store import open_state_store
+from stats import format_duration
+from star_index import StarIndex
+from user_links import UserLinks
 
 try:
     from config import *
@@ -35,6 +49,62 @@ except ImportError:
     CACHE_TTL = int(os.getenv('CACHE_TTL', '900'))
     TEST_SERVER_IDS = [int(id.strip()) for id in os.getenv('TEST_SERVER_IDS', '').split(',') if id.strip()]
 
+try:
+    from config import STATE_BACKEND, STATE_PATH
+except ImportError:
+    # "json" (one file per state) or "sqlite" (one database file)
+    STATE_BACKEND = os.getenv('STATE_BACKEND', 'json')
+    STATE_PATH = os.getenv('STATE_PATH')
+
+try:
+    from config import COMMAND_SYNC_SCOPE
+except ImportError:
+    # "guild" syncs commands to each guild, "global" does one global sync
+    COMMAND_SYNC_SCOPE = os.getenv('COMMAND_SYNC_SCOPE', 'guild')
+
+try:
+    from config import HISTORY_PATH
+except ImportError:
+    # SQLite file with the star event log, empty to disable history
+    HISTORY_PATH = os.getenv('HISTORY_PATH', 'history.sqlite3')
+
+try:
+    from config import METRICS_PORT
+except ImportError:
+    # Local Prometheus endpoint, disabled unless a port is given
+    METRICS_PORT = int(os.getenv('METRICS_PORT', '0')) or None
+
+try:
+    from config import DIGEST_WINDOW
+except ImportError:
+    # Seconds during which new stars are merged into one summary message per
+    # channel that is edited in place; 0 announces every star on its own line
+    DIGEST_WINDOW = int(os.getenv('DIGEST_WINDOW', '3600'))
+
+try:
+    from config import CLUSTER_LOCK_PATH
+except ImportError:
+    # Lock file shared by several bot processes (e.g. one per shard). Only the
+    # process holding it polls AoC and announces; the others serve commands
+    # from the data it stores. Unset for a single process.
+    CLUSTER_LOCK_PATH = os.getenv('CLUSTER_LOCK_PATH')
+
+try:
+    from config import SHARD_ID, SHARD_COUNT
+except ImportError:
+    # Run one shard of a sharded bot, e.g. SHARD_ID=0 SHARD_COUNT=2
+    SHARD_ID = int(os.getenv('SHARD_ID')) if os.getenv('SHARD_ID') else None
+    SHARD_COUNT = int(os.getenv('SHARD_COUNT')) if os.getenv('SHARD_COUNT') else None
+
+try:
+    from config import LEADERBOARDS
+except ImportError:
+    # Comma-separated "leaderboard_id:year:channel_id" entries
+    LEADERBOARDS = [
+        dict(zip(('id', 'year', 'channel_id'), entry.strip().split(':')))
+        for entry in os.getenv('AOC_LEADERBOARDS', '').split(',') if entry.strip()
+    ]
+
 
 class AoCBot(discord.Client):
     def __init__(self):
@@ -44,26 +114,64 @@ class AoCBot(discord.Client):
         intents.guilds = True
         intents.messages = True
 
-        super().__init__(intents=intents)
+        super().__init__(intents=intents, shard_id=SHARD_ID, shard_count=SHARD_COUNT)
 
         # Add command tree for slash commands
         self.tree = app_commands.CommandTree(self)
 
         # Configuration
         self.ANNOUNCEMENT_CHANNEL_ID = (
-            1313520321747222610  # Channel to post announcements
+            1313520321747222610  # Default channel to post announcements
         )
         self.AOC_SESSION_TOKEN = (
             AOC_SESSION_TOKEN  # Store token in environment variable
         )
-        self.LAST_CHECK_FILE = "last_check.txt"
+        self.LAST_CHECK_FILE = "last_check.txt"  # Legacy, only read to seed the star index
+        self.MAX_CONCURRENT_FETCHES = 2
 
-        # Read last check time from file or default to 15 minutes ago
-        self.last_check_time = self.read_last_check_time()
+        # Persistent state: caches, star indexes and pending announcements
+        self.store = open_state_store(STATE_BACKEND, STATE_PATH)
 
-        # Manual mapping of AoC users to Discord names
-        self.user_mapping = {
-        }
+        # Append-only log of star events for historical questions
+        self.history = LeaderboardHistory(HISTORY_PATH) if HISTORY_PATH else None
+
+        # Slash commands are only synced where their definitions changed
+        sync_name = "command_sync" if SHARD_ID is None else f"command_sync_shard{SHARD_ID}"
+        self.command_syncer = CommandSyncer(self.tree, self.store, name=sync_name)
+        self.commands_registered = False
+
+        # Picks the polling interval from puzzle unlock time and recent activity
+        self.poll_policy = AdaptivePollPolicy()
+
+        # Outbound announcements, sent by their own worker and kept across restarts
+        self.announcements = AnnouncementQueue(
+            self.deliver_announcement, self.store, edit=self.edit_announcement
+        )
+
+        # Merges bursts of stars into per-channel summaries edited in place
+        self.digest = AnnouncementDigest(DIGEST_WINDOW) if DIGEST_WINDOW else None
+
+        # Leaderboards to poll, one per (leaderboard, year), each routed to its channel
+        self.board_configs = LEADERBOARDS or [
+            {
+                "id": AOC_LEADERBOARD_ID,
+                "year": AOC_YEAR,
+                "channel_id": self.ANNOUNCEMENT_CHANNEL_ID,
+            }
+        ]
+        self.boards = []
+        self.scheduler = None
+        self.http_session = None
+        self.metrics_runner = None
+        metrics.add_collector(self.collect_board_metrics)
+
+        # With several processes, only the one holding the lock polls and announces
+        self.election = LeaderElection(CLUSTER_LOCK_PATH) if CLUSTER_LOCK_PATH else None
+
+        # AoC members linked to Discord users with /link, mentioned in announcements
+        self.user_links = UserLinks(
+            self.store, lock_path=f"{CLUSTER_LOCK_PATH}.links" if CLUSTER_LOCK_PATH else None
+        )
 
         self.TESTING_MODE = TESTING_MODE
         self.TEST_SERVER_IDS = TEST_SERVER_IDS
@@ -71,188 +179,578 @@ class AoCBot(discord.Client):
             logger.info("🧪 Running in TESTING MODE - will only register commands in test servers")
             logger.info(f"Test server IDs: {self.TEST_SERVER_IDS}")
 
-        # Create leaderboard instance
-        self.leaderboard = AoCLeaderboard(
-            session_token=AOC_SESSION_TOKEN,
-            leaderboard_id=AOC_LEADERBOARD_ID,
-            year=AOC_YEAR
+    def create_boards(self):
+        """Create a board per configured leaderboard, sharing one HTTP session"""
+        boards = []
+        for config in self.board_configs:
+            leaderboard_id = str(config["id"])
+            year = int(config["year"])
+
+            # State is per event year and leaderboard; a single board used to
+            # keep unsuffixed names, which are migrated when they match
+            suffix = f"_{year}_{leaderboard_id}"
+            star_index_name = f"star_index{suffix}"
+            legacy = len(self.board_configs) == 1
+
+            leaderboard = AoCLeaderboard(
+                session_token=AOC_SESSION_TOKEN,
+                leaderboard_id=leaderboard_id,
+                year=year,
+                cache_name=cache_name_for(year, leaderboard_id),
+                session=self.http_session,
+                store=self.store,
+                legacy_cache_name="leaderboard_cache" if legacy else None,
+            )
+            # Until this process leads, data comes from the leader through the store
+            leaderboard.follower = self.election is not None
+            star_index = StarIndex.load(
+                self.store,
+                star_index_name,
+                legacy_path=self.LAST_CHECK_FILE,
+                year=year,
+                leaderboard_id=leaderboard_id,
+                legacy_name="star_index" if legacy else None,
+            )
+            boards.append(
+                Board(leaderboard, int(config["channel_id"]), star_index, star_index_name)
+            )
+        return boards
+
+    def collect_board_metrics(self):
+        """Per-board counters and queue depth for the metrics exporter"""
+        samples = [("aoc_pending_announcements", {}, len(self.announcements))]
+        for board in self.boards:
+            labels = {"board": board.name}
+            for name, value in sorted(board.leaderboard.stats.items()):
+                samples.append((f"aoc_leaderboard_{name}_total", labels, value))
+            samples.append(("aoc_board_failures", labels, board.failures))
+            samples.append(
+                ("aoc_circuit_open", labels, int(board.leaderboard.breaker.state == "open"))
+            )
+        samples.append(("aoc_poll_interval_seconds", {}, self.poll_policy.interval))
+        samples.append(("aoc_leader", {}, int(self.is_leader)))
+        return samples
+
+    @property
+    def is_leader(self):
+        """Whether this process polls AoC and announces"""
+        return self.election is None or self.election.is_leader
+
+    def try_lead(self):
+        """Take over polling and announcing if no other process holds the lead"""
+        if not self.election.try_acquire():
+            return False
+
+        # Pick up where the previous leader left off
+        for board in self.boards:
+            board.leaderboard.follower = False
+            board.star_index = StarIndex.load(
+                self.store,
+                board.star_index_name,
+                year=board.leaderboard.year,
+                leaderboard_id=board.leaderboard.leaderboard_id,
+            )
+        self.announcements = AnnouncementQueue(
+            self.deliver_announcement, self.store, edit=self.edit_announcement
         )
+        self.announcements.start()
+        logger.info("👑 This process now polls AoC and announces")
+        return True
+
+    def board_for_channel(self, channel_id):
+        """Return the board announcing to a channel, or the first board"""
+        for board in self.boards:
+            if board.channel_id == channel_id:
+                return board
+        return self.boards[0]
 
     async def setup_hook(self):
         logger.info("Bot is starting up...")
-        await self.check_for_new_stars()
+        self.http_session = create_session()
+        self.boards = self.create_boards()
+        self.scheduler = PollScheduler(
+            self.boards,
+            self.poll_board,
+            interval=self.poll_policy.interval,
+            max_concurrency=self.MAX_CONCURRENT_FETCHES,
+        )
+        logger.info(f"Polling {len(self.boards)} leaderboard(s)")
+
+        if self.election is None:
+            self.announcements.start()
+        if METRICS_PORT:
+            self.metrics_runner = await metrics.serve(port=METRICS_PORT)
+
+        await self.check_for_new_stars(stagger=False)
         self.check_for_new_stars.start()
         logger.info("Initial check complete and periodic checks started")
 
+    async def close(self):
+        # Followers never started the queue and must not overwrite the leader's
+        if self.is_leader:
+            await self.announcements.stop()
+        for board in self.boards:
+            await board.leaderboard.close()
+        if self.http_session is not None:
+            await self.http_session.close()
+        await self.store.close()
+        if self.history is not None:
+            self.history.close()
+        # Only hand over leadership once our state is on disk for the next leader
+        if self.election is not None:
+            self.election.release()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
+        await super().close()
+
+    def build_commands(self):
+        """Create the bot's slash commands"""
+        return [
+            app_commands.Command(
+                name="leaderboard",
+                description="Show the current AoC leaderboard, a page at a time",
+                callback=self.show_leaderboard
+            ),
+            app_commands.Command(
+                name="link",
+                description="Link your Discord account to your AoC name or member id",
+                callback=self.link_account
+            ),
+            app_commands.Command(
+                name="unlink",
+                description="Remove the link between your Discord and AoC accounts",
+                callback=self.unlink_account
+            ),
+            app_commands.Command(
+                name="starsplz",
+                description="Force check for new stars right now",
+                callback=self.force_star_check
+            ),
+            app_commands.Command(
+                name="botstats",
+                description="Show bot timings and counters",
+                callback=self.show_bot_stats
+            ),
+            app_commands.Command(
+                name="daystats",
+                description="Show solve times, part 2 gaps and ranks for a day",
+                callback=self.show_day_stats
+            ),
+            app_commands.Command(
+                name="fastest",
+                description="Show the fastest solver of each day",
+                callback=self.show_fastest
+            ),
+            app_commands.Command(
+                name="scores",
+                description="Show local scores recomputed from star timestamps",
+                callback=self.show_scores
+            )
+        ]
+
+    def command_guild_ids(self, guilds):
+        """Guilds that should get commands, honouring testing mode"""
+        guild_ids = []
+        for guild in guilds:
+            # Skip if we're in testing mode and this isn't a test server
+            if self.TESTING_MODE and guild.id not in self.TEST_SERVER_IDS:
+                logger.info(f"Skipping command registration for non-test server {guild.name}")
+                continue
+            guild_ids.append(guild.id)
+        return guild_ids
+
     async def on_ready(self):
         logger.info(f"Logged in as {self.user} (ID: {self.user.id})")
         logger.info("\nServers the bot is in:")
-        
-        # Register commands for each guild
         for guild in self.guilds:
             logger.info(f"- {guild.name} (ID: {guild.id})")
-            
-            # Skip if we're in testing mode and this isn't a test server
-            if self.TESTING_MODE and guild.id not in self.TEST_SERVER_IDS:
-                logger.info(f"Skipping command registration for non-test server {guild.name}")
-                continue
-                
-            logger.info("  Channels:")
             for channel in guild.channels:
-                logger.info(f"  - {channel.name} (ID: {channel.id})")
-            
-            # Register commands for this guild
-            guild_obj = discord.Object(id=guild.id)
-            
-            # Clear existing commands
-            self.tree.clear_commands(guild=guild_obj)
-            
-            # Add all commands
-            commands = [
-                app_commands.Command(
-                    name="leaderboard",
-                    description="Show the current AoC leaderboard",
-                    callback=self.show_leaderboard
-                ),
-                app_commands.Command(
-                    name="starsplz",
-                    description="Force check for new stars right now",
-                    callback=self.force_star_check
+                logger.debug(f"  - {channel.name} (ID: {channel.id})")
+
+        # on_ready fires again on every reconnect; commands only need registering once
+        if not self.commands_registered:
+            self.commands_registered = True
+            if COMMAND_SYNC_SCOPE == "global" and not self.TESTING_MODE:
+                await self.command_syncer.sync_global(self.build_commands())
+            else:
+                await self.command_syncer.sync_guilds(
+                    self.command_guild_ids(self.guilds), self.build_commands()
                 )
-            ]
-            
-            for command in commands:
-                self.tree.add_command(command, guild=guild_obj)
-            
-            # Sync all commands at once
-            await self.tree.sync(guild=guild_obj)
-            logger.info(f"✅ Added and synced all commands to guild {guild.id}")
 
         await self.change_presence(activity=discord.Game(name="Advent of Code 2024"))
 
+    async def on_guild_join(self, guild):
+        logger.info(f"Joined {guild.name} (ID: {guild.id})")
+        if COMMAND_SYNC_SCOPE != "global" or self.TESTING_MODE:
+            await self.command_syncer.sync_guilds(
+                self.command_guild_ids([guild]), self.build_commands()
+            )
+
     async def on_message(self, message):
         if message.author == self.user:  # Ignore messages from the bot itself
             return
 
         if message.content.lower() == "!aocstatus":
-            await message.channel.send(
-                f"🤖 Bot is online! Last check was at <t:{int(self.last_check_time)}:R>"
-            )
+            lines = [
+                "🤖 Bot is online!",
+                f"Polling every {self.poll_policy.interval // 60:.0f} minutes ({self.poll_policy.reason})",
+            ]
+            if self.election is not None:
+                role = "leader" if self.is_leader else "follower, serving the leader's data"
+                lines.append(f"Shard {SHARD_ID}: {role}")
+            for board in self.boards:
+                stats = board.leaderboard.stats
+                lines.append(
+                    f"**{board.name}**: last check was at <t:{int(board.star_index.last_poll)}:R>\n"
+                    f"HTTP: {stats['requests']} requests, {stats['not_modified']} not modified, "
+                    f"{stats['connections_reused']} reused connections\n"
+                    f"Cache: {stats['cache_hits']} hits, {stats['cache_misses']} misses, "
+                    f"{stats['cache_coalesced']} coalesced, {stats['cache_stale']} stale\n"
+                    f"Retries: {stats['retries']}, failures: {stats['failures']}, "
+                    f"circuit {board.leaderboard.breaker.state}\n"
+                    f"Render cache hit rate: {board.leaderboard.render_hit_rate:.0%}"
+                )
+            await message.channel.send("\n".join(lines))
 
         elif message.content.lower() == "!servers":
             server_list = "\n".join([f"• {guild.name}" for guild in self.guilds])
             await message.channel.send(f"I'm in these servers:\n{server_list}")
 
-    @tasks.loop(minutes=15)  # Run every 15 minutes
-    async def check_for_new_stars(self):
+    @tasks.loop(minutes=15)  # Interval is adjusted by the poll policy after each round
+    async def check_for_new_stars(self, stagger=True):
+        if not self.is_leader and not self.try_lead():
+            # Another process polls; check again soon in case it goes away
+            self.check_for_new_stars.change_interval(seconds=FOLLOWER_CHECK_INTERVAL)
+            return
+
+        if self.election is not None:
+            # Links may have been made through other processes
+            await self.user_links.areload()
+
         logger.info(f"\nChecking for new stars at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        results = await self.scheduler.run_round(stagger=stagger)
 
-        data = await self.leaderboard.fetch_data(force_fresh=True)
-        if not data:
-            logger.error("❌ Failed to fetch leaderboard data")
-            return
+        interval = self.poll_policy.next_interval(changed=any(results))
+        self.scheduler.interval = interval
+        self.check_for_new_stars.change_interval(seconds=interval)
+        logger.info(f"Next check in {interval // 60:.0f} minutes: {self.poll_policy.reason}")
 
-        channel = self.get_channel(self.ANNOUNCEMENT_CHANNEL_ID)
-        if not channel:
-            logger.error("❌ Could not find announcement channel")
-            return
+    async def poll_board(self, board):
+        """Fetch one board, announce its new stars and return whether there were any"""
+        data = await board.leaderboard.fetch_data(force_fresh=True)
+        if not data or board.leaderboard.is_stale:
+            raise PollFailed("no fresh leaderboard data")
 
-        new_achievements = self.leaderboard.check_for_new_stars(data, self.last_check_time)
+        new_achievements = board.leaderboard.check_for_new_stars(
+            data, board.star_index, mention=self.user_links.discord_for
+        )
+        await self.record_history(board, data)
         
         if new_achievements:
             logger.info(f"Found {len(new_achievements)} new achievements!")
-            messages = [achievement["message"] for achievement in new_achievements]
-            
-            # Split messages into chunks
-            message_chunks = []
-            current_chunk = []
-            current_length = 0
-
-            for message in messages:
-                # If adding this message would exceed limit, start new chunk
-                if current_length + len(message) + 1 > 1900:  # Leave some margin
-                    message_chunks.append("\n".join(current_chunk))
-                    current_chunk = [message]
-                    current_length = len(message)
-                else:
-                    current_chunk.append(message)
-                    current_length += len(message) + 1  # +1 for newline
-
-            # Add the last chunk if it exists
-            if current_chunk:
-                message_chunks.append("\n".join(current_chunk))
-
-            # Send each chunk
-            for chunk in message_chunks:
-                await self.send_message(channel, chunk)
-                print(
-                    f"{'🧪 Simulated' if self.TESTING_MODE else '✅'} message chunk of length {len(chunk)}"
-                )
+
+            # Hand off to the announcement queue so slow sends never delay polling
+            if self.digest is not None:
+                for key, content in self.digest.add(
+                    board.channel_id, new_achievements, board.leaderboard.year
+                ):
+                    self.announcements.put_message(board.channel_id, key, content)
+            else:
+                messages = [achievement["message"] for achievement in new_achievements]
+                self.announcements.put(board.channel_id, messages)
         else:
             logger.info("No new achievements found")
 
-        # Update last check time and save it
-        self.last_check_time = int(datetime.now().timestamp())
-        self.save_last_check_time(self.last_check_time)
+        # Persist announced stars and fingerprints
+        board.star_index.save(self.store, board.star_index_name)
+        return bool(new_achievements)
+
+    async def record_history(self, board, data):
+        """Append new star events to the history log"""
+        if self.history is None:
+            return
+
+        # The first poll after startup records everyone, to catch up on anything missed.
+        # After that, every member whose stars changed, including stars that were
+        # not announced because the member is new to the star index.
+        member_ids = None
+        if board.history_synced:
+            member_ids = board.star_index.changed
+            if not member_ids:
+                return
+
+        try:
+            added = await self.history.arecord(board.name, data, member_ids)
+            board.history_synced = True
+            if added:
+                logger.info(f"Recorded {added} star event(s) in history for {board.name}")
+        except Exception as e:
+            logger.error(f"❌ Failed to record history for {board.name}: {e}", exc_info=True)
 
     @check_for_new_stars.before_loop
     async def before_check(self):
         """Wait until bot is ready before starting the task"""
         await self.wait_until_ready()
 
-    def read_last_check_time(self):
-        """Read last check time from file or return default"""
-        try:
-            with open(self.LAST_CHECK_FILE, "r") as f:
-                return int(f.read().strip())
-        except (FileNotFoundError, ValueError):
-            # If file doesn't exist or has invalid content, return 15 minutes ago
-            return int(datetime.now().timestamp()) - (15 * 60)
+    async def deliver_announcement(self, channel_id, content):
+        """Send one packed announcement message, called by the announcement queue"""
+        await self.wait_until_ready()
+        # The channel may belong to a guild on another process's shard
+        channel = self.get_channel(channel_id) or self.get_partial_messageable(channel_id)
 
-    def save_last_check_time(self, timestamp):
-        """Save last check time to file"""
-        with open(self.LAST_CHECK_FILE, "w") as f:
-            f.write(str(timestamp))
+        message = await self.send_message(channel, content)
+        metrics.inc("discord_announcements_sent_total")
+        logger.info(
+            f"{'🧪 Simulated' if self.TESTING_MODE else '✅'} message chunk of length {len(content)}"
+        )
+        return message
 
-    def get_discord_name(self, aoc_name):
-        """Get Discord name from AoC username"""
-        return self.user_mapping.get(aoc_name, aoc_name)
+    async def edit_announcement(self, channel_id, message_id, content):
+        """Update a summary message in place, called by the announcement queue"""
+        await self.wait_until_ready()
+        channel = self.get_channel(channel_id) or self.get_partial_messageable(channel_id)
+        metrics.inc("discord_announcements_edited_total")
+        try:
+            return await channel.get_partial_message(message_id).edit(content=content)
+        except discord.NotFound:
+            # Deleted in the meantime, post the summary again
+            return await self.send_message(channel, content)
 
+    @metrics.timed("discord_send_seconds")
     async def send_message(self, channel, content):
         """Wrapper for sending messages that respects testing mode"""
         if self.TESTING_MODE:
             logger.info("\n🧪 Would have sent to Discord:")
-            logger.info(f"Channel: {channel.name} ({channel.id})")
+            logger.info(f"Channel: {getattr(channel, 'name', 'unknown')} ({channel.id})")
             logger.info(f"Message content:\n{content}")
             return None
         else:
             return await channel.send(content)
 
-    async def show_leaderboard(self, interaction: discord.Interaction):
+    async def show_leaderboard(
+        self,
+        interaction: discord.Interaction,
+        top: Optional[app_commands.Range[int, 1, 1000]] = None,
+        around_me: bool = False,
+        first_day: Optional[app_commands.Range[int, 1, 25]] = None,
+        last_day: Optional[app_commands.Range[int, 1, 25]] = None,
+    ):
+        """Show the leaderboard one page at a time, with buttons to page through it"""
         await interaction.response.defer()
         
         try:
-            data = await self.leaderboard.fetch_data()
+            leaderboard = self.board_for_channel(interaction.channel_id).leaderboard
+            data = await leaderboard.fetch_data()
             if not data:
                 await interaction.followup.send("❌ Failed to fetch leaderboard data")
                 return
-            
-            message = self.leaderboard.format_leaderboard(data)
-            await interaction.followup.send(message)
+
+            member_id = self.find_aoc_member(data, interaction.user) if around_me else None
+            message, page, page_count = leaderboard.format_page(
+                data,
+                first_day=first_day or 1,
+                last_day=last_day,
+                top=top,
+                member_id=member_id,
+            )
+            if around_me and member_id is None:
+                message = "Couldn't find your AoC account, showing the first page\n" + message
+            if leaderboard.is_stale:
+                message = (
+                    f"⚠️ AoC is not responding, showing data from <t:{int(leaderboard.fetched_at)}:R>\n"
+                    + message
+                )
+
+            if page_count == 1:
+                await interaction.followup.send(message)
+                return
+
+            view = LeaderboardView(
+                leaderboard, page, page_count, first_day=first_day or 1, last_day=last_day, top=top
+            )
+            view.message = await interaction.followup.send(message, view=view, wait=True)
                 
         except Exception as e:
             logger.error(f"Error showing leaderboard: {e}", exc_info=True)
             await interaction.followup.send("❌ An error occurred while fetching the leaderboard")
 
+    def find_aoc_member(self, data, user):
+        """Return the AoC member id linked to a Discord user, or None
+
+        Falls back to an AoC member with the same name as the Discord user.
+        """
+        aoc_id = self.user_links.aoc_for(user.id)
+        if aoc_id is not None:
+            return aoc_id
+        discord_names = {user.name, user.display_name}
+        for member in data.members:
+            if member.name in discord_names:
+                return member.id
+        return None
+
+    async def link_account(self, interaction: discord.Interaction, aoc_name: str):
+        """Link the calling Discord user to an AoC member on this channel's board"""
+        await interaction.response.defer(ephemeral=True)
+
+        try:
+            leaderboard = self.board_for_channel(interaction.channel_id).leaderboard
+            data = await leaderboard.fetch_data()
+            if not data:
+                await interaction.followup.send("❌ Failed to fetch leaderboard data")
+                return
+
+            wanted = aoc_name.strip().casefold()
+            matches = [
+                member for member in data.members
+                if member.id == wanted or member.name.casefold() == wanted
+            ]
+            if len(matches) != 1:
+                problem = "No AoC member is" if not matches else "Several AoC members are"
+                await interaction.followup.send(
+                    f"❌ {problem} called `{aoc_name}`, try your AoC member id instead"
+                )
+                return
+
+            member = matches[0]
+            if self.election is not None:
+                await self.user_links.areload()
+            linked = self.user_links.discord_for(member.id)
+            if linked is not None and linked != interaction.user.id:
+                await interaction.followup.send(
+                    f"❌ **{member.name}** is already linked to <@{linked}>, they need to /unlink first"
+                )
+                return
+
+            await self.user_links.alink(member.id, interaction.user.id)
+            await interaction.followup.send(f"🔗 Linked you to **{member.name}**")
+
+        except Exception as e:
+            logger.error(f"Error linking accounts: {e}", exc_info=True)
+            await interaction.followup.send("❌ An error occurred while linking your account")
+
+    async def unlink_account(self, interaction: discord.Interaction):
+        """Remove the calling Discord user's AoC link"""
+        if self.election is not None:
+            await self.user_links.areload()
+        if await self.user_links.aunlink(interaction.user.id) is None:
+            await interaction.response.send_message("You are not linked to an AoC account", ephemeral=True)
+        else:
+            await interaction.response.send_message("✅ Unlinked your AoC account", ephemeral=True)
+
+    async def show_bot_stats(self, interaction: discord.Interaction):
+        """Show timing histograms and counters"""
+        lines = [metrics.summary() or "No timings recorded yet", ""]
+        for name, labels, value in metrics.collect():
+            label_text = f" [{', '.join(labels.values())}]" if labels else ""
+            lines.append(f"{name}{label_text}: {value}")
+
+        # Keep the code block within Discord's message limit
+        body = "\n".join(lines)[:1900]
+        await interaction.response.send_message(f"**📈 Bot stats**\n```\n{body}\n```")
+
+    async def show_day_stats(
+        self,
+        interaction: discord.Interaction,
+        day: Optional[app_commands.Range[int, 1, 25]] = None,
+    ):
+        """Show solve times, part 2 gaps and ranks for one day"""
+        await interaction.response.defer()
+
+        try:
+            leaderboard = self.board_for_channel(interaction.channel_id).leaderboard
+            data = await leaderboard.fetch_data()
+            if not data:
+                await interaction.followup.send("❌ Failed to fetch leaderboard data")
+                return
+
+            day = day or min(datetime.now(UNLOCK_TZ).day, 25)
+            results = leaderboard.get_stats(data).day_results(day)
+            if not results:
+                await interaction.followup.send(f"Nobody has solved day {day} yet")
+                return
+
+            lines = [f"**📊 Day {day}**", "```", f"{'#':>3} {'Name':<20} {'Part 1':>10} {'Part 2':>10} {'Gap':>10}"]
+            for member, part1, part2, gap, rank in results[:20]:
+                part2_text = format_duration(part2) if part2 else "-"
+                gap_text = format_duration(gap) if gap is not None else "-"
+                lines.append(
+                    f"{rank:>3} {member.name[:20]:<20} {format_duration(part1):>10} {part2_text:>10} {gap_text:>10}"
+                )
+            lines.append("```")
+            await interaction.followup.send("\n".join(lines))
+
+        except Exception as e:
+            logger.error(f"Error showing day stats: {e}", exc_info=True)
+            await interaction.followup.send("❌ An error occurred while computing day stats")
+
+    async def show_fastest(self, interaction: discord.Interaction):
+        """Show the fastest part 1 and part 2 solver of each day"""
+        await interaction.response.defer()
+
+        try:
+            leaderboard = self.board_for_channel(interaction.channel_id).leaderboard
+            data = await leaderboard.fetch_data()
+            if not data:
+                await interaction.followup.send("❌ Failed to fetch leaderboard data")
+                return
+
+            stats = leaderboard.get_stats(data)
+            lines = ["**⚡ Fastest solvers**", "```"]
+            for day in range(1, 26):
+                fastest = [stats.fastest(day, part) for part in (1, 2)]
+                if not fastest[0]:
+                    continue
+                parts = [
+                    f"{member.name[:16]} {format_duration(seconds)}" if member else "-"
+                    for member, seconds in (result or (None, 0) for result in fastest)
+                ]
+                lines.append(f"Day {day:>2}: ☆ {parts[0]:<26} ★ {parts[1]}")
+            lines.append("```")
+            await interaction.followup.send("\n".join(lines))
+
+        except Exception as e:
+            logger.error(f"Error showing fastest solvers: {e}", exc_info=True)
+            await interaction.followup.send("❌ An error occurred while computing fastest solvers")
+
+    async def show_scores(self, interaction: discord.Interaction):
+        """Show local scores recomputed from every member's star timestamps"""
+        await interaction.response.defer()
+
+        try:
+            leaderboard = self.board_for_channel(interaction.channel_id).leaderboard
+            data = await leaderboard.fetch_data()
+            if not data:
+                await interaction.followup.send("❌ Failed to fetch leaderboard data")
+                return
+
+            standings = leaderboard.get_stats(data).standings()
+            if not standings:
+                await interaction.followup.send("Nobody has any stars yet")
+                return
+
+            lines = ["**🏅 Local scores**", "```", f"{'#':>3} {'Name':<20} {'Score':>6} {'Stars':>6}"]
+            for rank, (member, score) in enumerate(standings[:20], 1):
+                lines.append(f"{rank:>3} {member.name[:20]:<20} {score:>6} {member.stars:>6}")
+            lines.append("```")
+            await interaction.followup.send("\n".join(lines))
+
+        except Exception as e:
+            logger.error(f"Error showing local scores: {e}", exc_info=True)
+            await interaction.followup.send("❌ An error occurred while computing local scores")
+
     async def force_star_check(self, interaction: discord.Interaction):
         """Force an immediate check for new stars"""
         await interaction.response.defer()
         
         try:
             logger.info(f"\n⭐ Forced star check requested by {interaction.user} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+            if not self.is_leader and not self.try_lead():
+                await interaction.followup.send("Stars are checked by another bot process")
+                return
             
             # Run the star check
-            await self.check_for_new_stars()
+            await self.check_for_new_stars(stagger=False)
             
             await interaction.followup.send("✅ checked for new stars!")
             
@@ -261,6 +759,11 @@ class AoCBot(discord.Client):
             await interaction.followup.send("❌ An error occurred while checking for stars")
 
 
-# Create and run the bot
-bot = AoCBot()
-bot.run(TOKEN)
+def main():
+    """Create and run the bot"""
+    bot = AoCBot()
+    bot.run(TOKEN)
+
+
+if __name__ == "__main__":
+    main()
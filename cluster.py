@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+import logging
+import os
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+logger = logging.getLogger("AoCBot")
+
+# How often a follower process tries to take over leadership, in seconds
+FOLLOWER_CHECK_INTERVAL = 60
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on a file, shared by all bot processes, while in the block"""
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class LeaderElection:
+    """Elect one leader among bot processes sharing a lock file
+
+    The leader holds an exclusive lock on the file for as long as it runs.
+    The OS releases the lock when the process exits, so followers retrying
+    try_acquire() take over from a leader that died.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    @property
+    def is_leader(self):
+        return self._file is not None
+
+    def try_acquire(self):
+        """Take the leader lock if it is free and return whether this process leads"""
+        if self._file is not None:
+            return True
+
+        f = open(self.path, "a+")
+        if fcntl is None:
+            logger.warning("File locks are not supported here, every process leads")
+        else:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                f.close()
+                return False
+
+        # Record the leader's pid for whoever looks at the lock file
+        f.seek(0)
+        f.truncate()
+        f.write(f"{os.getpid()}\n")
+        f.flush()
+        self._file = f
+        logger.info(f"👑 Took the leader lock {self.path}")
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
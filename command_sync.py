@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+import json
+import logging
+
+import discord
+
+logger = logging.getLogger("AoCBot")
+
+GLOBAL_KEY = "global"
+
+
+def command_payload(command, tree):
+    """Return the definition Discord receives for a command"""
+    try:
+        return command.to_dict(tree)
+    except TypeError:
+        # discord.py < 2.4 takes no tree argument
+        return command.to_dict()
+
+
+def command_digest(commands, tree):
+    """Hash command definitions so unchanged ones can skip syncing"""
+    payloads = sorted(
+        (command_payload(command, tree) for command in commands),
+        key=lambda payload: payload["name"],
+    )
+    return hashlib.sha256(json.dumps(payloads, sort_keys=True).encode()).hexdigest()
+
+
+class CommandSyncer:
+    """Register app commands and sync them only where their definitions changed
+
+    The digest last synced to each guild (or globally) is kept in the state
+    store, so restarts and reconnects with unchanged commands cost no API
+    calls. Guild syncs run concurrently with bounded parallelism.
+    """
+
+    def __init__(self, tree, store, name="command_sync", max_concurrency=4):
+        self.tree = tree
+        self.store = store
+        self.name = name
+        self.synced = store.load(name, {})
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def sync_global(self, commands):
+        """Register commands globally, syncing once if they changed"""
+        self.tree.clear_commands(guild=None)
+        for command in commands:
+            self.tree.add_command(command)
+
+        digest = command_digest(commands, self.tree)
+        if self.synced.get(GLOBAL_KEY) == digest:
+            logger.info("Global commands unchanged, skipping sync")
+            return False
+
+        await self.tree.sync()
+        self._record(GLOBAL_KEY, digest)
+        logger.info("✅ Synced global commands")
+        return True
+
+    async def sync_guilds(self, guild_ids, commands):
+        """Register commands in each guild and sync the guilds that changed"""
+        digest = None
+        stale = []
+        for guild_id in guild_ids:
+            guild_obj = discord.Object(id=guild_id)
+            self.tree.clear_commands(guild=guild_obj)
+            for command in commands:
+                self.tree.add_command(command, guild=guild_obj)
+
+            digest = digest or command_digest(commands, self.tree)
+            if self.synced.get(str(guild_id)) != digest:
+                stale.append(guild_id)
+
+        logger.info(f"Syncing commands to {len(stale)} of {len(guild_ids)} guild(s)")
+        results = await asyncio.gather(
+            *(self._sync_guild(guild_id, digest) for guild_id in stale)
+        )
+        return sum(results)
+
+    async def _sync_guild(self, guild_id, digest):
+        async with self._semaphore:
+            try:
+                await self.tree.sync(guild=discord.Object(id=guild_id))
+            except discord.HTTPException as e:
+                logger.error(f"❌ Failed to sync commands to guild {guild_id}: {e}")
+                return False
+        self._record(str(guild_id), digest)
+        logger.info(f"✅ Synced commands to guild {guild_id}")
+        return True
+
+    def _record(self, key, digest):
+        self.synced[key] = digest
+        self.store.save(self.name, self.synced)
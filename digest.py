@@ -0,0 +1,110 @@
+import time
+
+from announcer import DISCORD_MESSAGE_LIMIT
+from model import unlock_ts
+from stats import format_duration
+
+# Seconds a channel's summary message keeps being edited before a new one starts
+DIGEST_WINDOW = 3600
+
+
+class ChannelDigest:
+    """One summary message: a line per member and day, updated in place"""
+
+    __slots__ = ("key", "opened_at", "lines", "rows", "parts", "length")
+
+    def __init__(self, key, opened_at):
+        self.key = key
+        self.opened_at = opened_at
+        self.lines = []
+        self.rows = {}  # (member_id, day) -> index into lines
+        self.parts = {}  # (member_id, day) -> {part: star timestamp}
+        self.length = -1
+
+    def render(self):
+        return "\n".join(self.lines)
+
+
+class AnnouncementDigest:
+    """Coalesce star announcements per channel into summary messages
+
+    Stars arriving within the window are merged into the channel's open
+    summary, one line per member and day ("finished Day 5 (both parts) in
+    12m03s"), so a burst becomes one message that is edited as stars come
+    in. Only lines that changed are re-rendered.
+    """
+
+    def __init__(self, window=DIGEST_WINDOW, clock=time.monotonic):
+        self.window = window
+        self.clock = clock
+        self._open = {}
+        self._counter = 0
+
+    def add(self, channel_id, achievements, year):
+        """Merge new stars into the channel's summary
+
+        Returns (key, content) for each summary message that changed; the
+        key stays the same for as long as a message keeps being edited.
+        """
+        changed = []
+        for achievement in achievements:
+            digest = self._digest_for(channel_id, achievement)
+            if not self._merge(digest, achievement, year):
+                # The updated line would not fit: continue it in a new summary
+                row = (achievement["member_id"], achievement["day"])
+                parts = dict(digest.parts.get(row, {}))
+                digest = self._start(channel_id)
+                digest.parts[row] = parts
+                self._merge(digest, achievement, year)
+            if digest not in changed:
+                changed.append(digest)
+        return [(digest.key, digest.render()) for digest in changed]
+
+    def _digest_for(self, channel_id, achievement):
+        """Return the open summary for a channel, starting a new one if needed"""
+        now = self.clock()
+        digest = self._open.get(channel_id)
+        row = (achievement["member_id"], achievement["day"])
+        if digest is not None and now - digest.opened_at < self.window:
+            # A new line must still fit, with room for existing lines to grow
+            if row in digest.rows or digest.length + 120 <= DISCORD_MESSAGE_LIMIT:
+                return digest
+        return self._start(channel_id)
+
+    def _start(self, channel_id):
+        """Open a new summary for a channel"""
+        self._counter += 1
+        digest = ChannelDigest(f"{channel_id}:{int(time.time())}:{self._counter}", self.clock())
+        self._open[channel_id] = digest
+        return digest
+
+    def _merge(self, digest, achievement, year):
+        """Add a star to its line, returning False if the summary would get too long"""
+        row = (achievement["member_id"], achievement["day"])
+        parts = dict(digest.parts.get(row, {}))
+        parts[achievement["part"]] = achievement["time"]
+        line = self._render_line(achievement["name"], achievement["day"], parts, year)
+
+        index = digest.rows.get(row)
+        growth = 1 + len(line) if index is None else len(line) - len(digest.lines[index])
+        if digest.lines and digest.length + growth > DISCORD_MESSAGE_LIMIT:
+            return False
+
+        digest.parts[row] = parts
+        if index is None:
+            digest.rows[row] = len(digest.lines)
+            digest.lines.append(line)
+            digest.length += 1 + len(line)
+        else:
+            digest.length += len(line) - len(digest.lines[index])
+            digest.lines[index] = line
+        return True
+
+    @staticmethod
+    def _render_line(name, day, parts, year):
+        latest = max(parts.values())
+        duration = format_duration(latest - unlock_ts(year, day))
+        if len(parts) == 2:
+            return f"🌟 {name} finished Day {day} (both parts) in {duration}"
+        part = next(iter(parts))
+        return f"{'⭐' if part == 1 else '🌟'} {name} finished Day {day} Part {part} in {duration}"
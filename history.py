@@ -0,0 +1,178 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import sqlite3
+
+from model import PARTS, Leaderboard
+
+logger = logging.getLogger("AoCBot")
+
+# Write a checkpoint after this many new star events for a board
+CHECKPOINT_EVERY = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS star_events (
+    board TEXT NOT NULL,
+    member_id TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    part INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    PRIMARY KEY (board, member_id, day, part)
+);
+CREATE INDEX IF NOT EXISTS star_events_ts ON star_events (board, ts);
+CREATE TABLE IF NOT EXISTS members (
+    board TEXT NOT NULL,
+    member_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (board, member_id)
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    board TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    last_event INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (board, ts)
+);
+"""
+
+
+class LeaderboardHistory:
+    """Append-only log of star events with periodic checkpoints
+
+    Each poll only appends the stars that are new since the previous
+    poll. A checkpoint stores the full state as of a timestamp, so
+    rebuilding the leaderboard at any time starts from the nearest
+    earlier checkpoint instead of replaying the whole log.
+    """
+
+    def __init__(self, path="history.sqlite3", checkpoint_every=CHECKPOINT_EVERY):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history")
+
+    def record(self, board, leaderboard, member_ids=None):
+        """Append the stars of the given members (default: all) not yet in the log
+
+        Returns the number of new events.
+        """
+        members = leaderboard.members
+        if member_ids is not None:
+            wanted = set(member_ids)
+            members = [member for member in members if member.id in wanted]
+
+        events = []
+        names = []
+        for member in members:
+            names.append((board, member.id, member.name))
+            for offset, ts in enumerate(leaderboard.member_timestamps(member)):
+                if ts:
+                    day, part = divmod(offset, PARTS)
+                    events.append((board, member.id, day + 1, part + 1, ts))
+
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO members VALUES (?, ?, ?)", names)
+            before = self._db.total_changes
+            self._db.executemany("INSERT OR IGNORE INTO star_events VALUES (?, ?, ?, ?, ?)", events)
+            added = self._db.total_changes - before
+
+        if added and self._events_since_checkpoint(board) >= self.checkpoint_every:
+            self.checkpoint(board)
+        return added
+
+    def _events_since_checkpoint(self, board):
+        """Events logged for a board after its latest checkpoint
+
+        Counted from the database, so restarts do not reset the count.
+        """
+        return self._db.execute(
+            "SELECT COUNT(*) FROM star_events WHERE board = ? AND rowid > "
+            "(SELECT COALESCE(MAX(last_event), 0) FROM checkpoints WHERE board = ?)",
+            (board, board),
+        ).fetchone()[0]
+
+    def checkpoint(self, board):
+        """Store the full current state of a board"""
+        row = self._db.execute(
+            "SELECT MAX(ts), MAX(rowid) FROM star_events WHERE board = ?", (board,)
+        ).fetchone()
+        if row[0] is None:
+            return
+        ts, last_event = row
+        state = self._state_at(board, ts)
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?)",
+                (board, ts, last_event, json.dumps(state)),
+            )
+        logger.info(f"Wrote history checkpoint for {board} at <t:{ts}>")
+
+    def _state_at(self, board, ts):
+        """Return {member_id: [[day, part, ts], ...]} for stars earned by ts"""
+        checkpoint = self._db.execute(
+            "SELECT ts, last_event, state FROM checkpoints WHERE board = ? AND ts <= ? "
+            "ORDER BY ts DESC LIMIT 1",
+            (board, ts),
+        ).fetchone()
+
+        if checkpoint is None:
+            state = {}
+            rows = self._db.execute(
+                "SELECT member_id, day, part, ts FROM star_events WHERE board = ? AND ts <= ?",
+                (board, ts),
+            )
+        else:
+            checkpoint_ts, last_event, state_text = checkpoint
+            state = json.loads(state_text)
+            # Events after the checkpoint, plus late-logged events from before it
+            rows = self._db.execute(
+                "SELECT member_id, day, part, ts FROM star_events WHERE board = ? AND ts <= ? "
+                "AND (ts > ? OR rowid > ?)",
+                (board, ts, checkpoint_ts, last_event),
+            )
+
+        for member_id, day, part, star_ts in rows:
+            state.setdefault(member_id, []).append([day, part, star_ts])
+        return state
+
+    def state_at(self, board, ts):
+        """Rebuild the board as a Leaderboard model as of a timestamp
+
+        Local scores are not part of the log and are left at 0.
+        """
+        state = self._state_at(board, ts)
+        names = dict(
+            self._db.execute("SELECT member_id, name FROM members WHERE board = ?", (board,))
+        )
+
+        members = {}
+        for member_id, stars in state.items():
+            completion = {}
+            for day, part, star_ts in stars:
+                completion.setdefault(str(day), {})[str(part)] = {"get_star_ts": star_ts}
+            members[member_id] = {
+                "name": names.get(member_id),
+                "stars": len(stars),
+                "local_score": 0,
+                "last_star_ts": max(star_ts for _, _, star_ts in stars),
+                "completion_day_level": completion,
+            }
+        return Leaderboard.from_json({"members": members})
+
+    async def arecord(self, board, leaderboard, member_ids=None):
+        """Like record, without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self.record, board, leaderboard, member_ids
+        )
+
+    async def astate_at(self, board, ts):
+        """Like state_at, without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.state_at, board, ts)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._db.close()
@@ -1,115 +1,579 @@
 import asyncio
+from collections import Counter
 from datetime import datetime
 import json
-import aiohttp
-from config import CACHE_TTL
 import logging
+import os
+import sys
+import time
+
+try:
+    from config import CACHE_TTL
+except ImportError:
+    CACHE_TTL = int(os.getenv("CACHE_TTL", "900"))
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from announcer import DISCORD_MESSAGE_LIMIT
+from metrics import metrics
+from model import DAYS, PARTS, Leaderboard, as_model, unlock_ts
+from resilience import (
+    SESSION_EXPIRED_TIMEOUT,
+    CircuitBreaker,
+    FetchError,
+    RetryPolicy,
+    SessionExpiredError,
+)
+from state_store import JsonStateStore
 
 logger = logging.getLogger("AoCBot")
 
+# Connection pool settings for the long-lived leaderboard session.
+# aiohttp is imported when the first session is made, so offline tools
+# importing this module do not pay for it.
+HTTP_TIMEOUT = {"total": 30, "connect": 10, "sock_read": 20}
+HTTP_POOL_LIMIT = 4
+HTTP_KEEPALIVE_TIMEOUT = 120  # seconds an idle connection is kept open
+
+# Paged leaderboard layout; longer names are cut to keep pages compact
+MAX_PAGE_SIZE = 20
+PAGE_NAME_WIDTH = 24
+PAGE_TITLE_WIDTH = 200  # Title plus notices such as a stale data warning
+ROW_SUFFIX_WIDTH = 24
+
+# How often a follower process checks the store for data from the leader
+SNAPSHOT_CHECK_INTERVAL = 5
+
+
+def loads(body):
+    """Parse JSON from bytes or a buffer, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(body)
+    # The standard library parser cannot read memoryviews directly
+    return json.loads(bytes(body) if isinstance(body, memoryview) else body)
+
+
+def parse_leaderboard(body):
+    """Parse a raw leaderboard payload straight into the model
+
+    Raises ValueError for anything that is not a leaderboard, including
+    JSON that parses but does not have the shape the model expects.
+    """
+    data = loads(body)
+    # Caches written before raw payloads were stored wrap the payload
+    if isinstance(data, dict) and "members" not in data and "data" in data:
+        data = data["data"]
+    if not isinstance(data, dict) or "members" not in data:
+        raise ValueError("Leaderboard payload has no members")
+    try:
+        return Leaderboard.from_json(data)
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Malformed leaderboard payload: {e!r}") from e
+
+
+async def _on_connection_created(session, ctx, params):
+    if ctx.trace_request_ctx is not None:
+        ctx.trace_request_ctx["connections_created"] += 1
+
+
+async def _on_connection_reused(session, ctx, params):
+    if ctx.trace_request_ctx is not None:
+        ctx.trace_request_ctx["connections_reused"] += 1
+
+
+def create_session():
+    """Create a pooled HTTP session that can be shared by several leaderboards
+
+    Connection counters are recorded on the stats passed as
+    trace_request_ctx with each request.
+    """
+    import aiohttp
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_create_end.append(_on_connection_created)
+    trace_config.on_connection_reuseconn.append(_on_connection_reused)
+
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_LIMIT,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=3600,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(**HTTP_TIMEOUT),
+        headers={
+            "User-Agent": "github.com/yourusername/aoc-discord-bot by your@email.com",
+        },
+        trace_configs=[trace_config],
+    )
+
 
 class AoCLeaderboard:
-    def __init__(self, session_token, leaderboard_id, year):
+    def __init__(
+        self,
+        session_token,
+        leaderboard_id,
+        year,
+        cache_name="leaderboard_cache",
+        session=None,
+        store=None,
+        legacy_cache_name=None,
+    ):
         self.session_token = session_token
         self.leaderboard_id = leaderboard_id
         self.year = year
         self.CACHE_TTL = CACHE_TTL
         self.LEADERBOARD_URL = f"https://adventofcode.com/{year}/leaderboard/private/view/{leaderboard_id}.json"
-        self.LEADERBOARD_CACHE_FILE = "leaderboard_cache.json"
-
-    def read_cache(self):
-        """Read cached leaderboard data if it exists and is fresh"""
-        try:
-            with open(self.LEADERBOARD_CACHE_FILE, "r") as f:
-                cache_data = json.load(f)
-                cache_time = cache_data.get("timestamp", 0)
-
-                if (datetime.now().timestamp() - cache_time) < self.CACHE_TTL:
-                    logger.info("Using cached leaderboard data")
-                    return cache_data.get("data")
-                else:
-                    logger.info("Cache expired")
-                    return None
-        except (FileNotFoundError, json.JSONDecodeError):
+        self.LEADERBOARD_CACHE_NAME = cache_name
+        # Older cache name to warm-start from until the first fetch saves under cache_name
+        self.legacy_cache_name = legacy_cache_name
+        self.store = store or JsonStateStore()
+
+        # HTTP session, either shared by the caller or created lazily inside
+        # the running event loop and owned by this instance
+        self._session = session
+        self._owns_session = session is None
+
+        # Validators from the last 200 response, used for conditional requests
+        self._etag = None
+        self._last_modified = None
+
+        # In-memory cache; the stored cache is only read once to warm-start it
+        self._last_data = None
+        self._data_version = 0
+
+        # Rendered leaderboard messages and stats for the current data version
+        self._render_cache = {}
+        self._ranking = None
+        self._positions = None
+        self._stats = None
+        self._fetched_at = 0
+        self._warm_task = None
+        self._inflight = None
+
+        # Followers never call AoC; they read what the leader process stores
+        self.follower = False
+        self._updated_at = 0
+        self._snapshot_checked = 0
+
+        # Retries, circuit breaker and the error of the last failed fetch
+        self.retry = RetryPolicy()
+        self.breaker = CircuitBreaker()
+        self.last_error = None
+
+        # Counters for requests, 304 hits, connection reuse and cache use
+        self.stats = Counter()
+
+    def _get_session(self):
+        """Return the HTTP session, creating an owned one if needed"""
+        if self._session is None or (self._owns_session and self._session.closed):
+            self._session = create_session()
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        """Close the HTTP session if this instance owns it"""
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        if self._owns_session:
+            self._session = None
+
+    async def read_cache(self):
+        """Warm-start the in-memory cache from the state store, regardless of age
+
+        The stored payload is the raw response body, parsed in place from a
+        memory-mapped file where the store supports it. The metadata is read
+        first: it is saved after the payload, so the payload is never older.
+        A cache under the legacy name is only used if it is for this event.
+        """
+        meta = await self.store.aload(f"{self.LEADERBOARD_CACHE_NAME}_meta", {})
+        leaderboard = await self.store.aload_bytes(
+            self.LEADERBOARD_CACHE_NAME, parse_leaderboard
+        )
+        if leaderboard is None and self.legacy_cache_name:
+            meta = await self.store.aload(f"{self.legacy_cache_name}_meta", {})
+            leaderboard = await self.store.aload_bytes(self.legacy_cache_name, parse_leaderboard)
+            if leaderboard is not None and not self._is_this_event(leaderboard):
+                logger.info(f"Cache {self.legacy_cache_name} is from another event, ignoring it")
+                leaderboard = None
+
+        if leaderboard is None:
             logger.info("No valid cache found")
             return None
 
-    def save_cache(self, data):
-        """Save leaderboard data to cache file"""
-        cache_data = {"timestamp": datetime.now().timestamp(), "data": data}
-        with open(self.LEADERBOARD_CACHE_FILE, "w") as f:
-            json.dump(cache_data, f)
+        self._set_data(leaderboard)
+        self._fetched_at = meta.get("timestamp", 0)
+        self._updated_at = meta.get("updated", 0)
+        self._etag = meta.get("etag")
+        self._last_modified = meta.get("last_modified")
+        logger.info("Loaded leaderboard data from cache")
+        return self._last_data
+
+    def _is_this_event(self, leaderboard):
+        """Whether no star in the data predates this event's first unlock"""
+        first_unlock = unlock_ts(self.year, 1)
+        return all(not ts or ts >= first_unlock for ts in leaderboard.timestamps)
+
+    def save_cache(self, body=None):
+        """Save the fetch time and validators, and the raw payload if given"""
+        if body is not None:
+            self.store.save(self.LEADERBOARD_CACHE_NAME, bytes(body))
+        self.store.save(
+            f"{self.LEADERBOARD_CACHE_NAME}_meta",
+            {
+                "timestamp": self._fetched_at,
+                "updated": self._updated_at,
+                "etag": self._etag,
+                "last_modified": self._last_modified,
+            },
+        )
+
+    def _set_data(self, leaderboard):
+        """Make a parsed leaderboard the data shared by all consumers"""
+        self._last_data = leaderboard
+        self._data_version += 1
+        self._render_cache.clear()
+        self._ranking = None
+        self._positions = None
+        self._stats = None
+
+    def _cached_data(self):
+        """Return in-memory leaderboard data if it is still fresh"""
+        if self._last_data is None:
+            return None
+        if (datetime.now().timestamp() - self._fetched_at) >= self.CACHE_TTL:
+            return None
+        return self._last_data
 
+    @metrics.timed("aoc_fetch_seconds")
     async def fetch_data(self, force_fresh=False):
-        """Fetch data from AoC leaderboard with caching"""
-        if not force_fresh:
-            cached_data = self.read_cache()
-            if cached_data:
-                return cached_data
+        """Fetch data from AoC leaderboard with caching
 
-        headers = {
-            "Cookie": f"session={self.session_token}",
-            "User-Agent": "github.com/yourusername/aoc-discord-bot by your@email.com",
-        }
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.LEADERBOARD_URL, headers=headers) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    self.save_cache(data)
-                    logger.info("Fetched fresh leaderboard data and updated cache")
-                    return data
-                logger.error(f"Failed to fetch leaderboard data: {response.status}")
-                return None
+        Fresh in-memory data is returned directly. Expired data is still
+        returned straight away while a refresh runs in the background
+        (stale-while-revalidate); callers only wait when there is no data
+        at all. Concurrent callers share a single in-flight request. When
+        the fetch fails, the last good data (or None) is returned.
+        """
+        if self.follower:
+            return await self._follow_snapshot()
 
+        if not force_fresh:
+            await self._warm_start()
+            cached_data = self._cached_data()
+            if cached_data is not None:
+                self.stats["cache_hits"] += 1
+                return cached_data
+            if self._last_data is not None:
+                self.stats["cache_stale"] += 1
+                self._refresh()
+                return self._last_data
+
+        if self._inflight is not None:
+            self.stats["cache_coalesced"] += 1
+            return await asyncio.shield(self._inflight)
+
+        self.stats["cache_misses"] += 1
+        return await asyncio.shield(self._refresh())
+
+    def _refresh(self):
+        """Start a fetch unless one is already running, and return it"""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch_remote())
+            self._inflight.add_done_callback(self._clear_inflight)
+        return self._inflight
+
+    async def _follow_snapshot(self):
+        """Return the data the leader process last stored, reloading it when it changed"""
+        now = time.monotonic()
+        if self._last_data is not None and now - self._snapshot_checked < SNAPSHOT_CHECK_INTERVAL:
+            return self._last_data
+        self._snapshot_checked = now
+
+        meta = await self.store.aload(f"{self.LEADERBOARD_CACHE_NAME}_meta", {})
+        if self._last_data is None or meta.get("updated", 0) != self._updated_at:
+            self.stats["snapshot_reloads"] += 1
+            await self.read_cache()
+        else:
+            self._fetched_at = meta.get("timestamp", self._fetched_at)
+        return self._last_data
+
+    async def _warm_start(self):
+        """Read the stored cache once, shared by all callers"""
+        if self._warm_task is None:
+            self._warm_task = asyncio.ensure_future(self.read_cache())
+        await asyncio.shield(self._warm_task)
+
+    def _clear_inflight(self, task):
+        if self._inflight is task:
+            self._inflight = None
+
+    @property
+    def fetched_at(self):
+        """When the current data was last confirmed by AoC, as a Unix timestamp"""
+        return self._fetched_at
+
+    @property
+    def is_stale(self):
+        """Whether the last fetch failed, so data may be out of date"""
+        return self.last_error is not None
+
+    async def _fetch_remote(self):
+        """Fetch the leaderboard with retries, returning the last good data on failure
+
+        Network errors, 429 and 5xx responses are retried with jittered
+        backoff. Repeated failures open the circuit breaker, and an expired
+        session cookie opens it for much longer, so AoC is not hammered.
+        """
+        import aiohttp
+
+        await self._warm_start()
+
+        if not self.breaker.allow():
+            self.stats["circuit_open"] += 1
+            logger.info("Circuit open, serving cached leaderboard data")
+            return self._last_data
+
+        delays = self.retry.delays()
+        while True:
+            try:
+                data = await self._request()
+            except SessionExpiredError as e:
+                self._fetch_failed(e)
+                self.breaker.trip(SESSION_EXPIRED_TIMEOUT)
+                return self._last_data
+            except ValueError as e:
+                # Unexpected status or a payload that does not parse
+                self._fetch_failed(e)
+                self.breaker.record_failure()
+                return self._last_data
+            except (FetchError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                delay = next(delays, None)
+                if delay is None:
+                    self._fetch_failed(e)
+                    self.breaker.record_failure()
+                    return self._last_data
+                self.stats["retries"] += 1
+                metrics.inc("aoc_http_retries_total")
+                logger.warning(f"Leaderboard fetch failed ({e!r}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            else:
+                self.last_error = None
+                self.breaker.record_success()
+                return data
+
+    def _fetch_failed(self, error):
+        self.last_error = error
+        self.stats["failures"] += 1
+        metrics.inc("aoc_http_failures_total")
+        logger.error(f"❌ Failed to fetch leaderboard data: {error!r}")
+
+    async def _request(self):
+        """Make one HTTP request for the leaderboard and store the result"""
+        # Only send validators if we still hold the body they describe
+        headers = {"Cookie": f"session={self.session_token}"}
+        if self._last_data is not None:
+            if self._etag:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified:
+                headers["If-Modified-Since"] = self._last_modified
+
+        session = self._get_session()
+        self.stats["requests"] += 1
+        metrics.inc("aoc_http_requests_total")
+        # AoC answers an invalid session with a redirect to the login page
+        async with session.get(
+            self.LEADERBOARD_URL,
+            headers=headers,
+            allow_redirects=False,
+            trace_request_ctx=self.stats,
+        ) as response:
+            if response.status == 304:
+                self.stats["not_modified"] += 1
+                self._fetched_at = datetime.now().timestamp()
+                self.save_cache()
+                logger.info("Leaderboard not modified since last fetch")
+                return self._last_data
+            if response.status == 200 and response.content_type != "text/html":
+                body = await response.read()
+                with metrics.timer("aoc_parse_seconds"):
+                    leaderboard = parse_leaderboard(body)
+                self._set_data(leaderboard)
+                self._etag = response.headers.get("ETag")
+                self._last_modified = response.headers.get("Last-Modified")
+                self._fetched_at = self._updated_at = datetime.now().timestamp()
+                self.save_cache(body)
+                logger.info("Fetched fresh leaderboard data and updated cache")
+                return self._last_data
+            if response.status in (200, 301, 302, 303, 400, 401, 403):
+                raise SessionExpiredError(f"AoC rejected the session cookie (HTTP {response.status})")
+            if response.status == 429 or response.status >= 500:
+                raise FetchError(f"HTTP {response.status}")
+            raise ValueError(f"Unexpected HTTP {response.status}")
+
+    @property
+    def render_hit_rate(self):
+        """Fraction of leaderboard renders served from the render cache"""
+        total = self.stats["render_hits"] + self.stats["render_misses"]
+        return self.stats["render_hits"] / total if total else 0.0
+
+    @metrics.timed("aoc_stats_seconds")
+    def get_stats(self, data):
+        """Return ranks, solve times and scores, computed once per data version"""
+        # Imported here as it may pull in NumPy
+        from stats import LeaderboardStats
+
+        leaderboard = as_model(data)
+        if leaderboard is not self._last_data:
+            return LeaderboardStats(leaderboard, self.year)
+        if self._stats is None:
+            self._stats = LeaderboardStats(leaderboard, self.year)
+        return self._stats
+
+    @metrics.timed("aoc_render_seconds")
     def format_leaderboard(self, data):
-        """Format leaderboard data into a readable message"""
-        users = []
-        current_day = datetime.now().day
-
+        """Format leaderboard data into a readable message
+
+        Messages for the data currently held by the client are cached per
+        data version and day until new data is stored.
+        """
+        leaderboard = as_model(data)
+        current_day = min(datetime.now().day, DAYS)
+
+        if leaderboard is not self._last_data:
+            return self._render_leaderboard(leaderboard, current_day)
+
+        key = (self._data_version, current_day)
+        message = self._render_cache.get(key)
+        if message is None:
+            self.stats["render_misses"] += 1
+            message = self._render_leaderboard(leaderboard, current_day)
+            self._render_cache[key] = message
+        else:
+            self.stats["render_hits"] += 1
+        return message
+
+    def _render_leaderboard(self, leaderboard, current_day):
+        """Render the leaderboard table up to the given day"""
+        active_members = self._rank_members(leaderboard)
+        max_name_length = max((len(member.name) for member in active_members), default=0)
+        return self._render_table(
+            leaderboard,
+            active_members,
+            "**🎄 Advent of Code Leaderboard 🎄**\n",
+            first_day=1,
+            last_day=current_day,
+            name_width=max_name_length,
+        )
+
+    @staticmethod
+    def _rank_members(leaderboard):
+        """Members with stars, ordered by stars, then score, then name"""
+        active_members = [member for member in leaderboard.members if member.stars > 0]
+        active_members.sort(key=lambda member: (-member.stars, -member.local_score, member.name))
+        return active_members
+
+    def ranking(self, data):
+        """Return the sorted active members, computed once per data version"""
+        leaderboard = as_model(data)
+        if leaderboard is not self._last_data:
+            return self._rank_members(leaderboard)
+        if self._ranking is None:
+            self._ranking = self._rank_members(leaderboard)
+            self._positions = {member.id: i for i, member in enumerate(self._ranking)}
+        return self._ranking
+
+    def position(self, data, member_id):
+        """0-based position of a member in the ranking, or None if they have no stars"""
+        ranking = self.ranking(data)
+        if ranking is self._ranking:
+            return self._positions.get(str(member_id))
+        for i, member in enumerate(ranking):
+            if member.id == str(member_id):
+                return i
+        return None
+
+    @staticmethod
+    def page_size(name_width, first_day, last_day):
+        """Rows per page that keep a page within Discord's message limit"""
+        # Rank, name, day columns and the "(50⭐ Score: 12345)" suffix
+        row_width = 5 + name_width + 2 + (last_day - first_day + 1) * 2 + ROW_SUFFIX_WIDTH
+        header = PAGE_TITLE_WIDTH + 3 * row_width
+        return max(1, min(MAX_PAGE_SIZE, (DISCORD_MESSAGE_LIMIT - header) // row_width))
+
+    @metrics.timed("aoc_render_seconds")
+    def format_page(self, data, page=0, first_day=1, last_day=None, top=None, member_id=None):
+        """Render one page of the leaderboard
+
+        Only the requested rows are rendered, from the ranking computed once
+        per data version. The view can be limited to the top N members and to
+        a window of days; passing member_id shows the page that member is on.
+        Returns (message, page, page count) with page clamped to the valid
+        range. Pages of the data held by the client are cached.
+        """
+        leaderboard = as_model(data)
+        last_day = min(last_day or min(datetime.now().day, DAYS), DAYS)
+        first_day = max(1, min(first_day, last_day))
+
+        members = self.ranking(leaderboard)
+        if top:
+            members = members[:top]
+        name_width = min(max((len(member.name) for member in members), default=0), PAGE_NAME_WIDTH)
+        size = self.page_size(name_width, first_day, last_day)
+        page_count = max(1, -(-len(members) // size))
+
+        if member_id is not None:
+            position = self.position(leaderboard, member_id)
+            if position is not None and position < len(members):
+                page = position // size
+        page = max(0, min(page, page_count - 1))
+
+        cacheable = leaderboard is self._last_data
+        key = ("page", self._data_version, first_day, last_day, top, page)
+        message = self._render_cache.get(key) if cacheable else None
+        if message is None:
+            start = page * size
+            title = (
+                f"**🎄 Advent of Code Leaderboard 🎄** "
+                f"Days {first_day}-{last_day}, page {page + 1}/{page_count}\n"
+            )
+            message = self._render_table(
+                leaderboard,
+                members[start:start + size],
+                title,
+                first_day=first_day,
+                last_day=last_day,
+                name_width=name_width,
+                first_rank=start + 1,
+            )
+            if cacheable:
+                self.stats["render_misses"] += 1
+                self._render_cache[key] = message
+        else:
+            self.stats["render_hits"] += 1
+        return message, page, page_count
+
+    def _render_table(
+        self, leaderboard, members, title, first_day, last_day, name_width, first_rank=None
+    ):
+        """Render members as rows of star columns for a window of days
+
+        With first_rank, rows are numbered and names cut to name_width.
+        """
         # Define star symbols with consistent width
         BOTH_STARS = "★"  # Full star
         ONE_STAR = "☆"  # Hollow star
         NO_STARS = "·"  # Middle dot (or could use "░" for a block)
 
-        # Get max name length for padding
-        max_name_length = 0
-        for member_data in data["members"].values():
-            name = member_data.get("name", "Anonymous")
-            if member_data.get("stars", 0) > 0:  # Only consider active users
-                max_name_length = max(max_name_length, len(name))
-
-        # Add padding to ensure alignment
-        name_padding = max_name_length + 2  # Add some extra space
-
-        for member_id, member_data in data["members"].items():
-            name = member_data.get("name", "Anonymous")
-            stars = member_data.get("stars", 0)
-            local_score = member_data.get("local_score", 0)
-
-            if stars == 0:
-                continue
-
-            day_status = []
-            completion_data = member_data.get("completion_day_level", {})
-
-            for day in range(1, current_day + 1):
-                day_info = completion_data.get(str(day), {})
-                if "2" in day_info:
-                    day_status.append(BOTH_STARS)
-                elif "1" in day_info:
-                    day_status.append(ONE_STAR)
-                else:
-                    day_status.append(NO_STARS)
-
-            users.append((name, stars, local_score, day_status))
-
-        users.sort(key=lambda x: (-x[1], -x[2], x[0]))
+        rank_width = 5 if first_rank is not None else 0
 
         # Format day numbers vertically for two digits
         day_numbers_top = []
         day_numbers_bottom = []
-        for day in range(1, current_day + 1):
+        for day in range(first_day, last_day + 1):
             if day < 10:
                 day_numbers_top.append(" ")
                 day_numbers_bottom.append(str(day))
@@ -117,82 +581,241 @@ class AoCLeaderboard:
                 day_numbers_top.append(str(day)[0])  # First digit
                 day_numbers_bottom.append(str(day)[1])  # Second digit
 
-        lines = ["**🎄 Advent of Code Leaderboard 🎄**\n"]
+        lines = [title]
 
         # Add day numbers in two rows for double digits
-        lines.append(f"```\n{'Day':<{max_name_length}}  {' '.join(day_numbers_top)}")
-        lines.append(f"{'':<{max_name_length}}  {' '.join(day_numbers_bottom)}")
+        lines.append(f"```\n{'Day':<{rank_width + name_width}}  {' '.join(day_numbers_top)}")
+        lines.append(f"{'':<{rank_width + name_width}}  {' '.join(day_numbers_bottom)}")
 
         # Create separator line that matches the header
         separator_length = (
-            max_name_length + 2 + current_day * 2
+            rank_width + name_width + 2 + (last_day - first_day + 1) * 2
         )  # name width + 2 spaces + day columns
         lines.append("-" * separator_length)
 
         # Format each user's line with proper padding
-        for i, (name, stars, score, day_status) in enumerate(users, 1):
+        for i, member in enumerate(members):
+            timestamps = leaderboard.member_timestamps(member)
+            day_status = []
+            for offset in range((first_day - 1) * PARTS, last_day * PARTS, PARTS):
+                if timestamps[offset + 1]:
+                    day_status.append(BOTH_STARS)
+                elif timestamps[offset]:
+                    day_status.append(ONE_STAR)
+                else:
+                    day_status.append(NO_STARS)
+
             status_line = " ".join(day_status)
             # Pad the name to align all status indicators
-            padded_name = f"{name:<{max_name_length}}"
-            lines.append(f"{padded_name}  {status_line}  ({stars}⭐ Score: {score})")
+            padded_name = f"{member.name[:name_width]:<{name_width}}"
+            if first_rank is not None:
+                padded_name = f"{first_rank + i:>4} {padded_name}"
+            lines.append(
+                f"{padded_name}  {status_line}  ({member.stars}⭐ Score: {member.local_score})"
+            )
 
         lines.append("```")
         return "\n".join(lines)
 
-    def check_for_new_stars(self, data, last_check_time):
-        """Check for new stars since last check"""
+    @metrics.timed("aoc_diff_seconds")
+    def check_for_new_stars(self, data, index, mention=None):
+        """Check for stars that have not been announced yet
+
+        Members whose (stars, last_star_ts) fingerprint is unchanged since
+        the previous poll are skipped. Returned stars are marked as
+        announced in the index.
+
+        Stars of a member the index has not seen before that predate the
+        previous poll are marked as announced without being returned, so
+        joining mid-season does not replay a member's history.
+
+        mention maps a member id to a linked Discord user id (or None),
+        which is mentioned in the message.
+        """
+        leaderboard = as_model(data)
         new_achievements = []
-        current_time = int(datetime.now().timestamp())
-
-        for member_id, member_data in data["members"].items():
-            member_name = member_data.get("name", "Anonymous")
-            logger.debug(f"Checking stars for {member_name}")
-
-            for day, stars in member_data["completion_day_level"].items():
-                for star_num, star_data in stars.items():
-                    star_time = int(star_data["get_star_ts"])
-
-                    if star_time > last_check_time:
-                        new_achievements.append(
-                            {
-                                "time": star_time,
-                                "message": f"🌟 **{member_name}** completed Day {day} Part {star_num} at <t:{star_time}:t>!",
-                            }
-                        )
-                        logger.info(
-                            f"Found new star: Day {day} Part {star_num} by {member_name}"
-                        )
+        index.changed = set()
 
+        for member in leaderboard.members:
+            fingerprint = (member.stars, member.last_star_ts)
+            if index.is_unchanged(member.id, fingerprint):
+                continue
+            index.changed.add(member.id)
+
+            logger.debug(f"Checking stars for {member.name}")
+            # A member new to the index gets only stars since the last poll
+            cutoff = index.baseline if member.id in index.announced else index.last_poll
+            announced = index.announced_for(member.id)
+            discord_id = mention(member.id) if mention else None
+            display_name = f"**{member.name}** (<@{discord_id}>)" if discord_id else f"**{member.name}**"
+            timestamps = leaderboard.member_timestamps(member)
+
+            for offset, star_time in enumerate(timestamps):
+                if not star_time:
+                    continue
+                day, star_num = divmod(offset, PARTS)
+                key = (day + 1, star_num + 1)
+                if key in announced:
+                    continue
+                announced.add(key)
+
+                if star_time <= cutoff:
+                    continue
+
+                new_achievements.append(
+                    {
+                        "time": star_time,
+                        "member_id": member.id,
+                        "day": key[0],
+                        "part": key[1],
+                        "name": display_name,
+                        "message": f"🌟 {display_name} completed Day {key[0]} Part {key[1]} at <t:{star_time}:t>!",
+                    }
+                )
+                logger.info(
+                    f"Found new star: Day {key[0]} Part {key[1]} by {member.name}"
+                )
+
+            index.fingerprints[member.id] = fingerprint
+
+        index.last_poll = int(datetime.now().timestamp())
         return sorted(new_achievements, key=lambda x: x["time"])
 
 
-async def test_leaderboard():
-    """Test function to fetch and display the leaderboard"""
-    from config import AOC_SESSION_TOKEN, AOC_LEADERBOARD_ID, AOC_YEAR
-    import asyncio
+def cache_name_for(year, leaderboard_id):
+    """Name the bot stores a board's leaderboard cache under"""
+    return f"leaderboard_cache_{year}_{leaderboard_id}"
+
+
+def _config():
+    """Session token, leaderboard id and year from config.py or the environment"""
+    try:
+        from config import AOC_SESSION_TOKEN, AOC_LEADERBOARD_ID, AOC_YEAR
+    except ImportError:
+        AOC_SESSION_TOKEN = os.getenv("AOC_SESSION_TOKEN")
+        AOC_LEADERBOARD_ID = os.getenv("AOC_LEADERBOARD_ID")
+        AOC_YEAR = int(os.getenv("AOC_YEAR", "2024"))
+    return AOC_SESSION_TOKEN, AOC_LEADERBOARD_ID, AOC_YEAR
+
+
+def _load_payload(args):
+    """Read the leaderboard from --file, or from the cache the bot keeps"""
+    if args.file:
+        with open(args.file, "rb") as f:
+            return parse_leaderboard(f.read())
+    store = JsonStateStore(args.state_dir)
+    data = store.load_bytes(args.cache_name, parse_leaderboard)
+    if data is None:
+        raise SystemExit(f"No cached leaderboard in {store.path(args.cache_name)}, pass --file")
+    return data
+
+
+async def _fetch(args):
+    """Fetch the leaderboard from AoC and store it as the bot would"""
+    session_token = _config()[0]
+    store = JsonStateStore(args.state_dir)
+    leaderboard = AoCLeaderboard(
+        session_token=session_token,
+        leaderboard_id=args.leaderboard_id,
+        year=args.year,
+        cache_name=args.cache_name,
+        store=store,
+    )
+    try:
+        data = await leaderboard.fetch_data(force_fresh=True)
+    finally:
+        await leaderboard.close()
+        await store.close()
+    if leaderboard.is_stale:
+        raise SystemExit(f"Failed to fetch leaderboard data: {leaderboard.last_error!r}")
+    return data
+
+
+def _run_command(args):
+    if args.command == "fetch":
+        if args.file:
+            data = _load_payload(args)
+        else:
+            data = asyncio.run(_fetch(args))
+        stars = sum(member.stars for member in data.members)
+        return f"{len(data.members)} members, {stars} stars"
+
+    data = _load_payload(args)
+    leaderboard = AoCLeaderboard("", "", args.year)
+    if args.command == "render":
+        day = max(1, min(args.day, DAYS))
+        if args.page is None:
+            return leaderboard._render_leaderboard(data, day)
+        return leaderboard.format_page(data, args.page - 1, last_day=day)[0]
+
+    from star_index import StarIndex
+
+    index = StarIndex(baseline=args.since)
+    achievements = leaderboard.check_for_new_stars(data, index)
+    return "\n".join(achievement["message"] for achievement in achievements)
+
+
+def main(argv=None):
+    """Command line tools working on a leaderboard payload
+
+    fetch downloads and caches the leaderboard (or, with --file, only
+    parses one); render and diff work offline from --file or the cache.
+    With --repeat and --profile the command doubles as a profiling harness.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m leaderboard", description=main.__doc__.split("\n")[0])
+    parser.add_argument("command", choices=("fetch", "render", "diff"))
+    parser.add_argument("--file", help="Leaderboard JSON payload to read instead of the cache")
+    parser.add_argument("--state-dir", default=".", help="Directory with the bot's JSON state")
+    parser.add_argument("--year", type=int, help="Event year (default: from config)")
+    parser.add_argument("--leaderboard-id", help="Private leaderboard id (default: from config)")
+    parser.add_argument(
+        "--cache-name", help="State name of the cache (default: the bot's name for the board)"
+    )
+    parser.add_argument("--day", type=int, default=DAYS, help="Last day to render")
+    parser.add_argument("--page", type=int, help="Render one page of the paged leaderboard")
+    parser.add_argument("--since", type=int, default=0, help="Diff stars earned after this timestamp")
+    parser.add_argument("--repeat", type=int, default=1, help="Run the command this many times")
+    parser.add_argument("--profile", action="store_true", help="Print a cProfile report to stderr")
+    args = parser.parse_args(argv)
+
+    _, leaderboard_id, year = _config()
+    if args.year is None:
+        args.year = year
+    if args.leaderboard_id is None:
+        args.leaderboard_id = leaderboard_id
+    if args.cache_name is None:
+        args.cache_name = cache_name_for(args.year, args.leaderboard_id)
 
-    # Set up logging for test function
     logging.basicConfig(
-        level=logging.INFO,
+        level=logging.WARNING,
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     )
 
-    # Create leaderboard instance
-    leaderboard = AoCLeaderboard(
-        session_token=AOC_SESSION_TOKEN,
-        leaderboard_id=AOC_LEADERBOARD_ID,
-        year=AOC_YEAR,
-    )
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        output = _run_command(args)
+    elapsed = time.perf_counter() - start
+
+    if profiler is not None:
+        import pstats
+
+        profiler.disable()
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
 
-    # Fetch and display data
-    data = await leaderboard.fetch_data(force_fresh=True)
-    if data:
-        logger.info("\nFormatted Leaderboard:")
-        logger.info(leaderboard.format_leaderboard(data))
-    else:
-        logger.error("Failed to fetch leaderboard data")
+    if output:
+        print(output)
+    if args.repeat > 1 or args.profile:
+        print(f"{args.command}: {elapsed / args.repeat * 1000:.2f}ms per run", file=sys.stderr)
 
 
 if __name__ == "__main__":
-    # Run the test function
-    asyncio.run(test_leaderboard())
+    main()
@@ -0,0 +1,67 @@
+import logging
+
+import discord
+
+logger = logging.getLogger("AoCBot")
+
+# Seconds the page buttons stay active after the last click
+VIEW_TIMEOUT = 600
+
+
+class LeaderboardView(discord.ui.View):
+    """Previous/next buttons paging through a leaderboard message
+
+    Each click re-renders only the requested page, which the leaderboard
+    client caches per data version and view options.
+    """
+
+    def __init__(self, leaderboard, page, page_count, first_day=1, last_day=None, top=None):
+        super().__init__(timeout=VIEW_TIMEOUT)
+        self.leaderboard = leaderboard
+        self.page = page
+        self.page_count = page_count
+        self.first_day = first_day
+        self.last_day = last_day
+        self.top = top
+        self.message = None
+        self._update_buttons()
+
+    def _update_buttons(self):
+        self.previous_page.disabled = self.page <= 0
+        self.next_page.disabled = self.page >= self.page_count - 1
+
+    async def render(self, page):
+        """Render a page with the latest data and move the view to it"""
+        data = await self.leaderboard.fetch_data()
+        if not data:
+            return None
+        message, self.page, self.page_count = self.leaderboard.format_page(
+            data, page, first_day=self.first_day, last_day=self.last_day, top=self.top
+        )
+        self._update_buttons()
+        return message
+
+    async def _show(self, interaction, page):
+        message = await self.render(page)
+        if message is None:
+            await interaction.response.send_message(
+                "❌ Failed to fetch leaderboard data", ephemeral=True
+            )
+            return
+        await interaction.response.edit_message(content=message, view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction, button):
+        await self._show(interaction, self.page + 1)
+
+    async def on_timeout(self):
+        # Drop the buttons once they stop working
+        if self.message is not None:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException as e:
+                logger.warning(f"Could not remove leaderboard buttons: {e}")
@@ -0,0 +1,160 @@
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+import inspect
+import logging
+import time
+
+logger = logging.getLogger("AoCBot")
+
+# Upper bounds in seconds, from sub-millisecond renders to slow HTTP calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram:
+    """Fixed-bucket histogram of observed durations"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Approximate a quantile as the upper bound of its bucket"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """Process-wide counters and timing histograms
+
+    Recording is a dict lookup and a few additions, cheap enough to leave
+    on in production. Collectors add values owned by other objects (such
+    as per-board leaderboard stats) at export time.
+    """
+
+    def __init__(self):
+        self.counters = Counter()
+        self.histograms = {}
+        self.collectors = []
+
+    def inc(self, name, value=1):
+        self.counters[name] += value
+
+    def observe(self, name, value):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name):
+        """Time a block and record it in the named histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decorator recording a function's duration, for sync and async functions"""
+
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    start = time.perf_counter()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        self.observe(name, time.perf_counter() - start)
+
+                return async_wrapper
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def add_collector(self, collector):
+        """Register a callable returning (name, labels, value) tuples"""
+        self.collectors.append(collector)
+
+    def collect(self):
+        samples = [(name, {}, value) for name, value in sorted(self.counters.items())]
+        for collector in self.collectors:
+            samples.extend(collector())
+        return samples
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, labels, value in self.collect():
+            label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        for name, histogram in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum {histogram.sum}")
+            lines.append(f"{name}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Short human-readable summary of the timing histograms"""
+        lines = []
+        for name, histogram in sorted(self.histograms.items()):
+            if not histogram.count:
+                continue
+            mean_ms = histogram.sum / histogram.count * 1000
+            p95_ms = histogram.quantile(0.95) * 1000
+            lines.append(
+                f"{name}: n={histogram.count} mean={mean_ms:.1f}ms p95<={p95_ms:g}ms"
+            )
+        return "\n".join(lines)
+
+    async def serve(self, host="127.0.0.1", port=9108):
+        """Serve /metrics over HTTP and return the runner to clean it up with"""
+        from aiohttp import web
+
+        async def handle_metrics(request):
+            return web.Response(text=self.render_prometheus(), content_type="text/plain")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle_metrics)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        logger.info(f"📈 Serving metrics on http://{host}:{port}/metrics")
+        return runner
+
+
+metrics = Metrics()
@@ -0,0 +1,89 @@
+from array import array
+from datetime import datetime, timedelta, timezone
+
+DAYS = 25
+PARTS = 2
+SLOTS_PER_MEMBER = DAYS * PARTS
+
+# Puzzles unlock at midnight US Eastern (UTC-5 in December)
+UNLOCK_TZ = timezone(timedelta(hours=-5))
+
+
+def unlock_ts(year, day):
+    """Return when a day's puzzle unlocked, as a Unix timestamp"""
+    return int(datetime(year, 12, day, tzinfo=UNLOCK_TZ).timestamp())
+
+
+class Member:
+    """A single leaderboard member"""
+
+    __slots__ = ("id", "name", "stars", "local_score", "last_star_ts", "row")
+
+    def __init__(self, id, name, stars, local_score, last_star_ts, row):
+        self.id = id
+        self.name = name
+        self.stars = stars
+        self.local_score = local_score
+        self.last_star_ts = last_star_ts
+        self.row = row
+
+    def __repr__(self):
+        return f"Member(id={self.id!r}, name={self.name!r}, stars={self.stars})"
+
+
+class Leaderboard:
+    """Parsed leaderboard with completion timestamps in a dense grid
+
+    Timestamps are stored in one flat members x 25 days x 2 parts integer
+    array, 0 meaning the star has not been earned yet.
+    """
+
+    __slots__ = ("members", "by_id", "timestamps")
+
+    def __init__(self, members, timestamps):
+        self.members = members
+        self.by_id = {member.id: member for member in members}
+        self.timestamps = timestamps
+
+    @classmethod
+    def from_json(cls, data):
+        """Build the model from the AoC private leaderboard JSON"""
+        raw_members = data["members"]
+        members = []
+        timestamps = array("q", bytes(8 * SLOTS_PER_MEMBER * len(raw_members)))
+
+        for row, (member_id, member_data) in enumerate(raw_members.items()):
+            base = row * SLOTS_PER_MEMBER
+            for day, parts in member_data.get("completion_day_level", {}).items():
+                day_base = base + (int(day) - 1) * PARTS
+                for part, star_data in parts.items():
+                    timestamps[day_base + int(part) - 1] = int(star_data["get_star_ts"])
+
+            members.append(
+                Member(
+                    id=str(member_id),
+                    name=member_data.get("name") or "Anonymous",
+                    stars=member_data.get("stars", 0),
+                    local_score=member_data.get("local_score", 0),
+                    last_star_ts=int(member_data.get("last_star_ts", 0)),
+                    row=row,
+                )
+            )
+
+        return cls(members, timestamps)
+
+    def star_ts(self, member, day, part):
+        """Return when a member earned a star, or 0 if they have not"""
+        return self.timestamps[member.row * SLOTS_PER_MEMBER + (day - 1) * PARTS + part - 1]
+
+    def member_timestamps(self, member):
+        """Return a member's 50 timestamps ordered by day, then part"""
+        base = member.row * SLOTS_PER_MEMBER
+        return self.timestamps[base:base + SLOTS_PER_MEMBER]
+
+
+def as_model(data):
+    """Return data as a Leaderboard, parsing raw JSON if needed"""
+    if isinstance(data, Leaderboard):
+        return data
+    return Leaderboard.from_json(data)
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from model import UNLOCK_TZ
+
+# AoC asks clients not to request a private leaderboard more than once
+# every 15 minutes, so that is the fastest we ever poll.
+MIN_INTERVAL = 15 * 60
+MAX_INTERVAL = 2 * 60 * 60
+DORMANT_INTERVAL = 12 * 60 * 60
+
+# How long after the midnight ET unlock we stay at the fastest rate
+UNLOCK_RUSH = timedelta(hours=3)
+
+
+class AdaptivePollPolicy:
+    """Pick the polling interval from puzzle unlock time and recent activity
+
+    Polls at the fastest allowed rate in the hours after a puzzle unlocks,
+    doubles the interval for every poll that finds no change, and goes
+    dormant outside of December 1-25.
+    """
+
+    def __init__(
+        self,
+        min_interval=MIN_INTERVAL,
+        max_interval=MAX_INTERVAL,
+        dormant_interval=DORMANT_INTERVAL,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.dormant_interval = dormant_interval
+        self.idle_polls = 0
+        self.interval = min_interval
+        self.reason = "starting up"
+
+    def next_interval(self, changed, now=None):
+        """Record the outcome of a poll and return the next interval in seconds"""
+        now = (now or datetime.now(UNLOCK_TZ)).astimezone(UNLOCK_TZ)
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        self.idle_polls = 0 if changed else self.idle_polls + 1
+
+        if now.month != 12 or now.day > 25:
+            # Wake up in time for the first unlock on December 1st
+            year = now.year if now.month < 12 else now.year + 1
+            first_unlock = datetime(year, 12, 1, tzinfo=UNLOCK_TZ)
+            until_unlock = (first_unlock - now).total_seconds()
+            self.interval = max(self.min_interval, min(self.dormant_interval, until_unlock))
+            self.reason = "dormant outside of Advent (Dec 1-25)"
+            return self.interval
+
+        if now - midnight < UNLOCK_RUSH:
+            self.interval = self.min_interval
+            self.reason = f"puzzle for day {now.day} unlocked recently"
+        elif changed:
+            self.interval = self.min_interval
+            self.reason = "new stars on the last poll"
+        else:
+            self.interval = min(
+                self.min_interval * 2 ** self.idle_polls, self.max_interval
+            )
+            self.reason = f"no changes for {self.idle_polls} poll(s), backing off"
+
+        # Never sleep through the next unlock
+        until_unlock = (midnight + timedelta(days=1) - now).total_seconds()
+        self.interval = max(self.min_interval, min(self.interval, until_unlock))
+        return self.interval
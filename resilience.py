@@ -0,0 +1,97 @@
+import logging
+import random
+import time
+
+logger = logging.getLogger("AoCBot")
+
+# Retries per fetch and the most time they may spend sleeping in total
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 30.0
+RETRY_BUDGET = 60.0
+
+# Consecutive failed fetches before the circuit opens, and how long it stays open
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 600
+# An expired session cookie needs a human, so stop trying for much longer
+SESSION_EXPIRED_TIMEOUT = 6 * 3600
+
+
+class FetchError(Exception):
+    """A leaderboard fetch failed in a way that is worth retrying"""
+
+
+class SessionExpiredError(Exception):
+    """AoC rejected the session cookie; retrying will not help"""
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, capped by a total sleep budget"""
+
+    def __init__(
+        self,
+        attempts=RETRY_ATTEMPTS,
+        base_delay=RETRY_BASE_DELAY,
+        max_delay=RETRY_MAX_DELAY,
+        budget=RETRY_BUDGET,
+    ):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+
+    def delays(self):
+        """Yield the sleep before each retry, stopping when the budget runs out"""
+        spent = 0.0
+        for attempt in range(self.attempts):
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            if spent + delay > self.budget:
+                return
+            spent += delay
+            yield delay
+
+
+class CircuitBreaker:
+    """Stop calling a failing service until a cooldown has passed
+
+    Opens after failure_threshold consecutive failures, or immediately via
+    trip(). Once the cooldown is over, one trial call is let through
+    (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.cooldown = reset_timeout
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """Whether a call may be made now"""
+        return self.state != "open"
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info("✅ Circuit closed, AoC is responding again")
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.trip(self.reset_timeout)
+
+    def trip(self, cooldown):
+        """Open the circuit for cooldown seconds"""
+        self.opened_at = self.clock()
+        self.cooldown = cooldown
+        logger.warning(f"⚡ Circuit open, not calling AoC for {cooldown}s")
@@ -0,0 +1,69 @@
+import asyncio
+import logging
+
+logger = logging.getLogger("AoCBot")
+
+# Share of the polling interval over which board fetches are spread
+STAGGER_FRACTION = 0.5
+
+
+class PollFailed(Exception):
+    """A poll got no fresh data; counted as a board failure without a traceback"""
+
+
+class Board:
+    """A polled leaderboard and the channel it announces to"""
+
+    def __init__(self, leaderboard, channel_id, star_index, star_index_name):
+        self.leaderboard = leaderboard
+        self.channel_id = channel_id
+        self.star_index = star_index
+        self.star_index_name = star_index_name
+        self.failures = 0
+        self.history_synced = False
+
+    @property
+    def name(self):
+        return f"{self.leaderboard.year}/{self.leaderboard.leaderboard_id}"
+
+
+class PollScheduler:
+    """Poll several boards per round with staggered, bounded fetches
+
+    Each board's poll runs in isolation, so one failing board does not
+    stop the others.
+    """
+
+    def __init__(self, boards, poll, interval, max_concurrency=2):
+        self.boards = boards
+        self.poll = poll
+        self.interval = interval
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_round(self, stagger=True):
+        """Poll every board once and return each poll's result (None on failure)"""
+        step = 0
+        if stagger and len(self.boards) > 1:
+            step = self.interval * STAGGER_FRACTION / len(self.boards)
+
+        return await asyncio.gather(
+            *(self._run_board(board, i * step) for i, board in enumerate(self.boards))
+        )
+
+    async def _run_board(self, board, delay):
+        if delay:
+            await asyncio.sleep(delay)
+
+        async with self._semaphore:
+            try:
+                result = await self.poll(board)
+                board.failures = 0
+                return result
+            except PollFailed as e:
+                board.failures += 1
+                logger.error(f"❌ Polling board {board.name} failed: {e}")
+                return None
+            except Exception as e:
+                board.failures += 1
+                logger.error(f"❌ Polling board {board.name} failed: {e}", exc_info=True)
+                return None
@@ -0,0 +1,121 @@
+from datetime import datetime
+import logging
+
+from model import unlock_ts
+
+logger = logging.getLogger("AoCBot")
+
+
+class StarIndex:
+    """Persistent record of which stars have already been announced
+
+    Each member keeps the set of announced (day, part) keys plus a
+    (stars, last_star_ts) fingerprint, so a poll only has to look at
+    members whose fingerprint changed since the previous poll. (day, part)
+    keys are only meaningful for one event year of one leaderboard, which
+    the index records.
+    """
+
+    def __init__(self, baseline=0, year=None, leaderboard_id=None):
+        # Stars earned at or before the baseline are never announced. It is
+        # only used to seed the index the first time it is created.
+        self.baseline = baseline
+        self.last_poll = baseline
+        self.year = year
+        self.leaderboard_id = leaderboard_id
+        self.announced = {}
+        self.fingerprints = {}
+        # Member ids whose fingerprint changed in the latest check, not saved
+        self.changed = set()
+
+    def is_unchanged(self, member_id, fingerprint):
+        """Return True if the member looks the same as on the previous poll"""
+        return self.fingerprints.get(member_id) == fingerprint
+
+    def announced_for(self, member_id):
+        """Return the set of announced (day, part) keys for a member"""
+        return self.announced.setdefault(member_id, set())
+
+    def belongs_to(self, year, leaderboard_id):
+        """Whether the announced keys are for this event year and leaderboard"""
+        if self.year is not None or self.leaderboard_id is not None:
+            return (self.year, self.leaderboard_id) == (year, leaderboard_id)
+        # Indexes saved before these were recorded: an event's stars all come
+        # after its first unlock, so an index last polled before then is older
+        return year is None or self.last_poll >= unlock_ts(year, 1)
+
+    def to_dict(self):
+        return {
+            "year": self.year,
+            "leaderboard_id": self.leaderboard_id,
+            "baseline": self.baseline,
+            "last_poll": self.last_poll,
+            "members": {
+                member_id: {
+                    "fingerprint": list(self.fingerprints.get(member_id, (0, 0))),
+                    "announced": sorted(list(key) for key in keys),
+                }
+                for member_id, keys in self.announced.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        index = cls(
+            baseline=state.get("baseline", 0),
+            year=state.get("year"),
+            leaderboard_id=state.get("leaderboard_id"),
+        )
+        index.last_poll = state.get("last_poll", index.baseline)
+        for member_id, member_state in state.get("members", {}).items():
+            index.fingerprints[member_id] = tuple(member_state["fingerprint"])
+            index.announced[member_id] = {
+                tuple(key) for key in member_state["announced"]
+            }
+        return index
+
+    @classmethod
+    def load(cls, store, name, legacy_path=None, year=None, leaderboard_id=None, legacy_name=None):
+        """Load the index from the state store, migrating from legacy state
+
+        legacy_name is an older state name to take the index from if name
+        has none yet. An index for another year or leaderboard is replaced
+        by a new one announcing stars since its last poll.
+        """
+        source = name
+        state = store.load(name)
+        if state is None and legacy_name:
+            source = legacy_name
+            state = store.load(legacy_name)
+
+        if state is not None:
+            try:
+                index = cls.from_dict(state)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error(f"❌ Ignoring invalid star index {source}: {e}")
+            else:
+                if index.belongs_to(year, leaderboard_id):
+                    index.year, index.leaderboard_id = year, leaderboard_id
+                    if source != name:
+                        logger.info(f"Migrating star index {source} to {name}")
+                    return index
+                logger.info(f"Star index {source} is for another year or leaderboard, starting a new one")
+                return cls(baseline=index.last_poll, year=year, leaderboard_id=leaderboard_id)
+
+        baseline = None
+        if legacy_path:
+            try:
+                with open(legacy_path, "r") as f:
+                    baseline = int(f.read().strip())
+                logger.info(f"Seeding star index from {legacy_path}")
+            except (FileNotFoundError, ValueError):
+                pass
+
+        if baseline is None:
+            # Nothing to migrate from, only announce stars from the last 15 minutes
+            baseline = int(datetime.now().timestamp()) - (15 * 60)
+        return cls(baseline=baseline, year=year, leaderboard_id=leaderboard_id)
+
+    def save(self, store, name):
+        """Save the index to the state store"""
+        store.save(name, self.to_dict())
@@ -0,0 +1,277 @@
+from abc import ABC, abstractmethod
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import tempfile
+import time
+
+from cluster import file_lock
+
+logger = logging.getLogger("AoCBot")
+
+# Successive saves within this many seconds are written once
+WRITE_DELAY = 1.0
+
+
+def atomic_write(path, data):
+    """Write bytes to path via a temp file, fsync and rename
+
+    The temp file has a unique name, so processes sharing a state
+    directory never write into each other's temp files.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # Make the rename itself durable
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+class StateStore(ABC):
+    """Named JSON state with batched writes off the event loop
+
+    save() only records the latest value for a name; values are written
+    together after WRITE_DELAY seconds on a single background thread, so
+    rapid successive saves cost one write and never block the loop.
+    Bytes values are stored verbatim and read back with load_bytes().
+    """
+
+    def __init__(self, write_delay=WRITE_DELAY):
+        self.write_delay = write_delay
+        self._pending = {}
+        self._flush_handle = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state-store")
+
+    @abstractmethod
+    def _read(self, name):
+        """Return the stored JSON value for a name, or None"""
+
+    @abstractmethod
+    def _write(self, items):
+        """Write {name: value} items, bytes values verbatim"""
+
+    @abstractmethod
+    def _read_bytes(self, name, parse):
+        """Return parse(buffer) for a stored bytes value, or None"""
+
+    def load_bytes(self, name, parse=bytes):
+        """Return parse(buffer) for a bytes value, or None if there is none
+
+        The buffer may be a view over a memory-mapped file and is only
+        valid during the call.
+        """
+        pending = self._pending.get(name)
+        if isinstance(pending, bytes):
+            return parse(memoryview(pending))
+        try:
+            return self._read_bytes(name, parse)
+        except (ValueError, OSError, sqlite3.Error) as e:
+            logger.error(f"❌ Could not read state {name}: {e}")
+            return None
+
+    async def aload_bytes(self, name, parse=bytes):
+        """Like load_bytes, without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.load_bytes, name, parse)
+
+    def load(self, name, default=None):
+        """Load a value synchronously, for use at startup"""
+        if name in self._pending:
+            return self._pending[name]
+        try:
+            value = self._read(name)
+        except (ValueError, OSError, sqlite3.Error) as e:
+            logger.error(f"❌ Could not read state {name}: {e}")
+            return default
+        return default if value is None else value
+
+    async def aload(self, name, default=None):
+        """Load a value without blocking the event loop"""
+        if name in self._pending:
+            return self._pending[name]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.load, name, default)
+
+    def update(self, name, change, default=None, lock_path=None):
+        """Read a value, apply change to it and write the result immediately
+
+        For state that several processes write: with lock_path the whole
+        read-change-write holds that file lock, so no process's change is
+        lost. Returns the new value.
+        """
+        with file_lock(lock_path) if lock_path else nullcontext():
+            try:
+                value = self._read(name)
+            except (ValueError, OSError, sqlite3.Error) as e:
+                logger.error(f"❌ Could not read state {name}: {e}")
+                value = None
+            value = change(default if value is None else value)
+            self._write({name: value})
+        return value
+
+    async def aupdate(self, name, change, default=None, lock_path=None):
+        """Like update, without blocking the event loop"""
+        # A debounced value would later overwrite the update
+        self._pending.pop(name, None)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self.update, name, change, default, lock_path
+        )
+
+    def save(self, name, value):
+        """Schedule a value to be written; later saves replace earlier ones
+
+        Values are written in the order of their latest save, so a reader
+        in another process that sees one value also sees those saved before.
+        """
+        self._pending.pop(name, None)
+        self._pending[name] = value
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop, e.g. in scripts: write straight away
+            self._write(self._take_pending())
+            return
+
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(
+                self.write_delay, lambda: asyncio.ensure_future(self.flush())
+            )
+
+    def _take_pending(self):
+        items, self._pending = self._pending, {}
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        return items
+
+    async def flush(self):
+        """Write all pending values now"""
+        items = self._take_pending()
+        if not items:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._write, items)
+        except (OSError, TypeError, ValueError, sqlite3.Error) as e:
+            logger.error(f"❌ Failed to write state {', '.join(items)}: {e}")
+            # Keep the values so the next flush tries again, unless newer ones arrived
+            for name, value in items.items():
+                self._pending.setdefault(name, value)
+
+    async def close(self):
+        """Flush pending writes and release resources"""
+        await self.flush()
+        self._executor.shutdown(wait=True)
+
+
+class JsonStateStore(StateStore):
+    """State store keeping each name in its own <name>.json file"""
+
+    def __init__(self, directory=".", write_delay=WRITE_DELAY):
+        super().__init__(write_delay)
+        self.directory = directory
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}.json")
+
+    def _read(self, name):
+        try:
+            with open(self.path(name), "rb") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _read_bytes(self, name, parse):
+        try:
+            f = open(self.path(name), "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return parse(memoryview(b""))
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    return parse(view)
+
+    def _write(self, items):
+        for name, value in items.items():
+            data = value if isinstance(value, bytes) else json.dumps(value).encode()
+            atomic_write(self.path(name), data)
+
+
+class SQLiteStateStore(StateStore):
+    """State store keeping all names in one SQLite database"""
+
+    def __init__(self, path="aoc_bot.sqlite3", write_delay=WRITE_DELAY):
+        super().__init__(write_delay)
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS state (name TEXT PRIMARY KEY, value TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS blobs (name TEXT PRIMARY KEY, value BLOB NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _read(self, name):
+        row = self._db.execute("SELECT value FROM state WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _read_bytes(self, name, parse):
+        row = self._db.execute("SELECT value FROM blobs WHERE name = ?", (name,)).fetchone()
+        return parse(memoryview(row[0])) if row else None
+
+    def _write(self, items):
+        now = time.time()
+        rows = []
+        blobs = []
+        for name, value in items.items():
+            if isinstance(value, bytes):
+                blobs.append((name, value, now))
+            else:
+                rows.append((name, json.dumps(value), now))
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO state VALUES (?, ?, ?)", rows)
+            self._db.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?)", blobs)
+
+    async def close(self):
+        await super().close()
+        self._db.close()
+
+
+def open_state_store(backend="json", location=None):
+    """Create the state store for a configured backend"""
+    if backend == "sqlite":
+        return SQLiteStateStore(location or "aoc_bot.sqlite3")
+    if backend == "json":
+        return JsonStateStore(location or ".")
+    raise ValueError(f"Unknown state backend: {backend}")
@@ -0,0 +1,160 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from model import DAYS, PARTS, SLOTS_PER_MEMBER, unlock_ts
+
+
+def format_duration(seconds):
+    """Format a duration in seconds as e.g. 1h02m03s"""
+    hours, rest = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m{seconds:02d}s"
+    return f"{minutes}m{seconds:02d}s"
+
+
+class LeaderboardStats:
+    """Per-star ranks, solve times and recomputed local scores for a leaderboard
+
+    All grids are flat arrays laid out like Leaderboard.timestamps
+    (members x 25 days x 2 parts); 0 means the star was not earned. They
+    are computed in one batch, with NumPy when it is installed, along with
+    the fastest solver of each star. Per-day results are sorted on first
+    use and kept.
+    """
+
+    __slots__ = (
+        "leaderboard", "year", "solve_times", "ranks", "local_scores", "fastest_rows", "_days"
+    )
+
+    def __init__(self, leaderboard, year, use_numpy=None):
+        self.leaderboard = leaderboard
+        self.year = year
+        self._days = {}
+        if use_numpy is None:
+            use_numpy = np is not None
+        if use_numpy:
+            self._compute_numpy()
+        else:
+            self._compute_python()
+
+    def _unlock_offsets(self):
+        """Unlock timestamp for each of the 50 slots of a member"""
+        return [unlock_ts(self.year, day) for day in range(1, DAYS + 1) for _ in range(PARTS)]
+
+    def _compute_numpy(self):
+        members = len(self.leaderboard.members)
+        grid = np.frombuffer(self.leaderboard.timestamps, dtype=np.int64).reshape(
+            members, SLOTS_PER_MEMBER
+        )
+        earned = grid > 0
+        unlocks = np.array(self._unlock_offsets(), dtype=np.int64)
+
+        solve_times = np.where(earned, grid - unlocks, 0)
+
+        # Rank every star column by completion time; missing stars sort last
+        order = np.argsort(np.where(earned, grid, np.iinfo(np.int64).max), axis=0, kind="stable")
+        ranks = np.empty_like(order)
+        positions = np.broadcast_to(np.arange(1, members + 1)[:, None], order.shape)
+        np.put_along_axis(ranks, order, positions, axis=0)
+        ranks = np.where(earned, ranks, 0)
+
+        # AoC local score: each star is worth (members - rank + 1) points
+        local_scores = np.where(earned, members + 1 - ranks, 0).sum(axis=1)
+
+        self.solve_times = array("q", solve_times.astype(np.int64).tobytes())
+        self.ranks = array("q", ranks.astype(np.int64).tobytes())
+        self.local_scores = [int(score) for score in local_scores]
+        # Row ranked first in each star column, -1 if nobody has the star
+        if members:
+            fastest_rows = np.where(earned.any(axis=0), order[0], -1)
+        else:
+            fastest_rows = np.full(SLOTS_PER_MEMBER, -1)
+        self.fastest_rows = array("q", fastest_rows.astype(np.int64).tobytes())
+
+    def _compute_python(self):
+        timestamps = self.leaderboard.timestamps
+        members = len(self.leaderboard.members)
+        unlocks = self._unlock_offsets()
+
+        self.solve_times = array("q", bytes(8 * len(timestamps)))
+        self.ranks = array("q", bytes(8 * len(timestamps)))
+        self.local_scores = [0] * members
+        self.fastest_rows = array("q", [-1] * SLOTS_PER_MEMBER)
+
+        for slot in range(SLOTS_PER_MEMBER):
+            column = [
+                (timestamps[row * SLOTS_PER_MEMBER + slot], row)
+                for row in range(members)
+                if timestamps[row * SLOTS_PER_MEMBER + slot]
+            ]
+            column.sort()
+            for rank, (ts, row) in enumerate(column, 1):
+                index = row * SLOTS_PER_MEMBER + slot
+                self.solve_times[index] = ts - unlocks[slot]
+                self.ranks[index] = rank
+                self.local_scores[row] += members + 1 - rank
+            if column:
+                self.fastest_rows[slot] = column[0][1]
+
+    def _index(self, member, day, part):
+        return member.row * SLOTS_PER_MEMBER + (day - 1) * PARTS + part - 1
+
+    def solve_time(self, member, day, part):
+        """Seconds from unlock to the star, or 0 if not earned"""
+        return self.solve_times[self._index(member, day, part)]
+
+    def rank(self, member, day, part):
+        """1-based rank of the star within the leaderboard, or 0 if not earned"""
+        return self.ranks[self._index(member, day, part)]
+
+    def part_gap(self, member, day):
+        """Seconds between part 1 and part 2, or None if part 2 is missing"""
+        if not self.solve_time(member, day, 2):
+            return None
+        return self.solve_time(member, day, 2) - self.solve_time(member, day, 1)
+
+    def day_results(self, day):
+        """Members who solved part 1 of a day, ordered by rank
+
+        Returns (member, part 1 time, part 2 time or None, gap or None, rank)
+        tuples, ranked by part 2 if solved, then by part 1.
+        """
+        results = self._days.get(day)
+        if results is None:
+            results = self._days[day] = self._rank_day(day)
+        return results
+
+    def _rank_day(self, day):
+        results = []
+        for member in self.leaderboard.members:
+            part1 = self.solve_time(member, day, 1)
+            if not part1:
+                continue
+            part2 = self.solve_time(member, day, 2) or None
+            results.append((member, part1, part2, self.part_gap(member, day)))
+
+        results.sort(key=lambda result: (result[2] is None, result[2] or result[1]))
+        return [result + (rank,) for rank, result in enumerate(results, 1)]
+
+    def fastest(self, day, part=2):
+        """Return (member, solve time) of the fastest solver of a star, or None"""
+        row = self.fastest_rows[(day - 1) * PARTS + part - 1]
+        if row < 0:
+            return None
+        member = self.leaderboard.members[row]
+        return member, self.solve_time(member, day, part)
+
+    def standings(self):
+        """Return (member, local score) of members with stars, highest score first"""
+        scored = [
+            (member, score)
+            for member, score in zip(self.leaderboard.members, self.local_scores)
+            if score
+        ]
+        scored.sort(key=lambda item: -item[1])
+        return scored
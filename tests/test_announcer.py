@@ -0,0 +1,124 @@
+import asyncio
+import pytest
+from announcer import AnnouncementQueue, pack_messages
+from state_store import JsonStateStore
+
+def test_pack_messages_fills_messages_in_order():
+    lines = ["a" * 900, "b" * 900, "c" * 900, "d" * 50]
+    messages = pack_messages(lines)
+    assert len(messages) == 2
+    assert messages[0] == "a" * 900 + "\n" + "b" * 900
+    assert messages[1] == "c" * 900 + "\n" + "d" * 50
+    assert all(len(message) <= 2000 for message in pack_messages(["x" * 4500]))
+
+@pytest.mark.asyncio
+async def test_queue_packs_per_channel_and_survives_restart(tmp_path):
+    store = JsonStateStore(tmp_path, write_delay=0)
+    sent = []
+
+    async def send(channel_id, content):
+        sent.append((channel_id, content))
+
+    # Lines queued before a restart are still delivered afterwards
+    AnnouncementQueue(send, store).put(1, ["one", "two"])
+    queue = AnnouncementQueue(send, store)
+    assert len(queue) == 2
+
+    queue.put(2, ["three"])
+    queue.start()
+    for _ in range(50):
+        if not len(queue):
+            break
+        await asyncio.sleep(0.01)
+    await queue.stop()
+    await store.close()
+
+    assert sent == [(1, "one\ntwo"), (2, "three")]
+    assert len(AnnouncementQueue(send, JsonStateStore(tmp_path))) == 0
+
+@pytest.mark.asyncio
+async def test_queue_keeps_lines_when_send_fails(tmp_path, monkeypatch):
+    import announcer
+    monkeypatch.setattr(announcer, "RETRY_DELAY", 0.01)
+    attempts = []
+
+    async def send(channel_id, content):
+        attempts.append(content)
+        if len(attempts) == 1:
+            raise RuntimeError("rate limited")
+
+    queue = AnnouncementQueue(send, JsonStateStore(tmp_path))
+    queue.start()
+    queue.put(1, ["star"])
+    for _ in range(50):
+        if not len(queue):
+            break
+        await asyncio.sleep(0.01)
+    await queue.stop()
+
+    assert attempts == ["star", "star"]
+    assert len(queue) == 0
+
+@pytest.mark.asyncio
+async def test_keyed_messages_are_sent_once_then_edited(tmp_path):
+    class Message:
+        def __init__(self, id):
+            self.id = id
+
+    calls = []
+
+    async def send(channel_id, content):
+        calls.append(("send", content))
+        return Message(42)
+
+    async def edit(channel_id, message_id, content):
+        calls.append(("edit", message_id, content))
+        return Message(message_id)
+
+    queue = AnnouncementQueue(send, JsonStateStore(tmp_path), edit=edit)
+    # Replacing a message that is still queued costs no extra call
+    queue.put_message(1, "digest", "v1")
+    queue.put_message(1, "digest", "v2")
+    queue.start()
+    for _ in range(50):
+        if not len(queue):
+            break
+        await asyncio.sleep(0.01)
+
+    queue.put_message(1, "digest", "v3")
+    for _ in range(50):
+        if not len(queue):
+            break
+        await asyncio.sleep(0.01)
+    await queue.stop()
+
+    assert calls == [("send", "v2"), ("edit", 42, "v3")]
+
+@pytest.mark.asyncio
+async def test_failing_channel_does_not_block_others(tmp_path):
+    class Forbidden(Exception):
+        status = 403
+
+    sent = []
+
+    async def send(channel_id, content):
+        if channel_id == 1:
+            raise RuntimeError("Discord is having a bad day")
+        if channel_id == 2:
+            raise Forbidden("Missing Access")
+        sent.append((channel_id, content))
+
+    queue = AnnouncementQueue(send, JsonStateStore(tmp_path))
+    queue.put(1, ["one"])
+    queue.put(2, ["two"])
+    queue.put(3, ["three"])
+    queue.start()
+    for _ in range(50):
+        if len(queue) == 1:
+            break
+        await asyncio.sleep(0.01)
+    await queue.stop()
+
+    # Channel 1 backs off and keeps its line, channel 2's line is dropped
+    assert sent == [(3, "three")]
+    assert list(queue._pending) == [(1, "one")]
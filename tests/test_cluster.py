@@ -0,0 +1,42 @@
+import json
+import pytest
+from cluster import LeaderElection
+from leaderboard import AoCLeaderboard
+from state_store import JsonStateStore
+
+def test_only_one_process_leads_until_it_releases(tmp_path):
+    lock_path = tmp_path / "aocbot.lock"
+    leader = LeaderElection(lock_path)
+    follower = LeaderElection(lock_path)
+
+    assert leader.try_acquire()
+    assert not follower.try_acquire()
+    assert leader.is_leader and not follower.is_leader
+
+    leader.release()
+    assert follower.try_acquire()
+    follower.release()
+
+@pytest.mark.asyncio
+async def test_follower_serves_data_the_leader_stored(tmp_path):
+    payload = json.dumps(
+        {"members": {"12345": {"name": "Test User", "stars": 0, "completion_day_level": {}}}}
+    ).encode()
+    leader = AoCLeaderboard("fake_token", "123456", 2023, store=JsonStateStore(tmp_path))
+    follower = AoCLeaderboard("fake_token", "123456", 2023, store=JsonStateStore(tmp_path))
+    follower.follower = True
+
+    # Nothing published yet, and the follower never calls AoC
+    assert await follower.fetch_data() is None
+    assert follower.stats["requests"] == 0
+
+    leader._updated_at = 1
+    leader.save_cache(payload)
+    await leader.store.flush()
+    data = await follower.fetch_data()
+    assert data.members[0].name == "Test User"
+
+    # Unchanged data is not reloaded, even after the check interval
+    follower._snapshot_checked = 0
+    assert await follower.fetch_data() is data
+    assert follower.stats["snapshot_reloads"] == 2
@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from command_sync import CommandSyncer, command_digest
+from state_store import JsonStateStore
+
+class FakeCommand:
+    def __init__(self, name, description="A command"):
+        self.name = name
+        self.description = description
+
+    def to_dict(self, tree):
+        return {"name": self.name, "description": self.description}
+
+class FakeTree:
+    def __init__(self):
+        self.synced = []
+        self.running = 0
+        self.peak = 0
+
+    def clear_commands(self, guild):
+        pass
+
+    def add_command(self, command, guild=None):
+        pass
+
+    async def sync(self, guild=None):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        self.synced.append(guild.id if guild else "global")
+
+def test_command_digest_ignores_order():
+    tree = FakeTree()
+    first = [FakeCommand("a"), FakeCommand("b")]
+    assert command_digest(first, tree) == command_digest(list(reversed(first)), tree)
+    assert command_digest(first, tree) != command_digest([FakeCommand("a", "changed")], tree)
+
+@pytest.mark.asyncio
+async def test_only_changed_guilds_are_synced(tmp_path):
+    store = JsonStateStore(tmp_path)
+    tree = FakeTree()
+    commands = [FakeCommand("leaderboard")]
+
+    syncer = CommandSyncer(tree, store, max_concurrency=2)
+    assert await syncer.sync_guilds([1, 2, 3, 4], commands) == 4
+    assert tree.peak == 2
+    await store.flush()
+
+    # After a restart nothing changed, so nothing is synced
+    tree = FakeTree()
+    syncer = CommandSyncer(tree, JsonStateStore(tmp_path))
+    assert await syncer.sync_guilds([1, 2, 3, 4, 5], commands) == 1
+    assert tree.synced == [5]
+
+    assert await syncer.sync_global(commands) is True
+    assert await syncer.sync_global(commands) is False
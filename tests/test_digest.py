@@ -0,0 +1,58 @@
+from digest import AnnouncementDigest
+from model import unlock_ts
+
+def star(member_id, name, day, part, minutes, year=2023):
+    return {
+        "member_id": member_id,
+        "name": f"**{name}**",
+        "day": day,
+        "part": part,
+        "time": unlock_ts(year, day) + minutes * 60,
+    }
+
+def test_stars_of_a_member_and_day_merge_into_one_line():
+    digest = AnnouncementDigest(window=3600, clock=lambda: 0)
+    [(key, content)] = digest.add(1, [star("1", "Alice", 5, 1, 8), star("2", "Bob", 5, 1, 9)], 2023)
+    assert content.splitlines() == [
+        "⭐ **Alice** finished Day 5 Part 1 in 8m00s",
+        "⭐ **Bob** finished Day 5 Part 1 in 9m00s",
+    ]
+
+    # The next poll updates the same message, changing only Alice's line
+    [(same_key, content)] = digest.add(1, [star("1", "Alice", 5, 2, 12)], 2023)
+    assert same_key == key
+    assert content.splitlines()[0] == "🌟 **Alice** finished Day 5 (both parts) in 12m00s"
+    assert len(content.splitlines()) == 2
+
+def test_new_summary_after_the_window_or_per_channel():
+    now = [0]
+    digest = AnnouncementDigest(window=600, clock=lambda: now[0])
+    [(first, _)] = digest.add(1, [star("1", "Alice", 1, 1, 5)], 2023)
+    [(other_channel, _)] = digest.add(2, [star("1", "Alice", 1, 1, 5)], 2023)
+    assert other_channel != first
+
+    now[0] = 601
+    [(second, content)] = digest.add(1, [star("1", "Alice", 1, 2, 20)], 2023)
+    assert second != first
+    assert content == "🌟 **Alice** finished Day 1 Part 2 in 20m00s"
+
+def test_full_summary_continues_in_a_new_message():
+    digest = AnnouncementDigest(clock=lambda: 0)
+    stars = [star(str(i), f"Member {i}", 1, 1, i) for i in range(100)]
+    updates = digest.add(1, stars, 2023)
+    assert len(updates) > 1
+    assert all(len(content) <= 2000 for _, content in updates)
+    assert sum(len(content.splitlines()) for _, content in updates) == 100
+
+def test_rows_growing_past_the_limit_continue_in_a_new_message():
+    digest = AnnouncementDigest(clock=lambda: 0)
+    # Part 1 lines filling most of a message
+    [(first, content)] = digest.add(1, [star(str(i), "M" * 60, 1, 1, 5) for i in range(20)], 2023)
+    assert len(content) > 1800
+
+    # Every line grows when part 2 arrives; none may push the message over the limit
+    updates = digest.add(1, [star(str(i), "M" * 60, 1, 2, 50) for i in range(20)], 2023)
+    assert len(updates) == 2
+    assert all(len(content) <= 2000 for _, content in updates)
+    [(_, continued)] = [update for update in updates if update[0] != first]
+    assert "(both parts)" in continued
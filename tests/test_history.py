@@ -0,0 +1,60 @@
+from history import LeaderboardHistory
+from model import Leaderboard
+
+def make_leaderboard(stars):
+    """stars: {member_id: {(day, part): ts}}"""
+    members = {}
+    for member_id, member_stars in stars.items():
+        completion = {}
+        for (day, part), ts in member_stars.items():
+            completion.setdefault(str(day), {})[str(part)] = {"get_star_ts": ts}
+        members[member_id] = {
+            "name": f"User {member_id}",
+            "stars": len(member_stars),
+            "last_star_ts": max(member_stars.values(), default=0),
+            "completion_day_level": completion,
+        }
+    return Leaderboard.from_json({"members": members})
+
+def test_record_only_appends_new_events(tmp_path):
+    history = LeaderboardHistory(str(tmp_path / "history.sqlite3"))
+    first = make_leaderboard({"1": {(1, 1): 100, (1, 2): 200}})
+    assert history.record("2024/1", first) == 2
+    assert history.record("2024/1", first) == 0
+
+    second = make_leaderboard({"1": {(1, 1): 100, (1, 2): 200, (2, 1): 300}, "2": {(1, 1): 150}})
+    assert history.record("2024/1", second, member_ids={"2"}) == 1
+    assert history.record("2024/1", second) == 1
+    history.close()
+
+def test_state_at_uses_checkpoints_and_late_events(tmp_path):
+    history = LeaderboardHistory(str(tmp_path / "history.sqlite3"), checkpoint_every=3)
+    history.record("b", make_leaderboard({"1": {(1, 1): 100, (1, 2): 200, (2, 1): 300}}))
+    assert history._db.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0] == 1
+
+    # A star that happened before the checkpoint but was only logged after it
+    history.record("b", make_leaderboard({"2": {(1, 1): 150}, "1": {(2, 2): 400}}))
+
+    at_250 = history.state_at("b", 250)
+    assert {member.id: member.stars for member in at_250.members} == {"1": 2, "2": 1}
+    assert at_250.by_id["2"].name == "User 2"
+
+    at_500 = history.state_at("b", 500)
+    assert at_500.by_id["1"].stars == 4
+    assert at_500.star_ts(at_500.by_id["1"], 2, 2) == 400
+    assert history.state_at("b", 50).members == []
+    history.close()
+
+def test_checkpoint_count_survives_restarts(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    stars = {}
+    for day in range(1, 4):
+        stars[(day, 1)] = day * 100
+        history = LeaderboardHistory(path, checkpoint_every=3)
+        history.record("b", make_leaderboard({"1": stars}))
+        history.close()
+
+    history = LeaderboardHistory(path, checkpoint_every=3)
+    assert history._db.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0] == 1
+    assert history._events_since_checkpoint("b") == 0
+    history.close()
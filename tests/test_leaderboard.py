@@ -1,7 +1,13 @@
 import pytest
+import pytest_asyncio
 from datetime import datetime
 import json
+from announcer import DISCORD_MESSAGE_LIMIT
+from benchmarks.synthetic import generate_leaderboard
 from leaderboard import AoCLeaderboard
+from model import Leaderboard
+from star_index import StarIndex
+from state_store import JsonStateStore
 
 @pytest.fixture
 def mock_leaderboard():
@@ -35,17 +41,367 @@ def sample_leaderboard_data():
 
 def test_check_for_new_stars(mock_leaderboard, sample_leaderboard_data):
     # Test checking for new stars after a given timestamp
-    last_check_time = 1701430000  # Before first star
+    index = StarIndex(baseline=1701430000)  # Before first star
     new_achievements = mock_leaderboard.check_for_new_stars(
         sample_leaderboard_data, 
-        last_check_time
+        index
     )
     assert len(new_achievements) == 4
     assert "Test User" in new_achievements[0]["message"]
     assert "Day 1 Part 1" in new_achievements[0]["message"]
 
+def test_check_for_new_stars_announces_once(mock_leaderboard, sample_leaderboard_data, tmp_path):
+    index = StarIndex(baseline=1701432000)  # Day 1 Part 1 is already old
+    first = mock_leaderboard.check_for_new_stars(sample_leaderboard_data, index)
+    assert len(first) == 3
+
+    # Survives a restart and does not repeat anything
+    index.save(JsonStateStore(tmp_path), "star_index")
+    index = StarIndex.load(JsonStateStore(tmp_path), "star_index")
+    assert mock_leaderboard.check_for_new_stars(sample_leaderboard_data, index) == []
+
+    # A new star changes the member's fingerprint and is announced alone
+    member = sample_leaderboard_data["members"]["12345"]
+    member["completion_day_level"]["3"] = {"1": {"get_star_ts": "1701604800"}}
+    member["stars"] = 7
+    member["last_star_ts"] = 1701604800
+    new_achievements = mock_leaderboard.check_for_new_stars(sample_leaderboard_data, index)
+    assert len(new_achievements) == 1
+    assert "Day 3 Part 1" in new_achievements[0]["message"]
+
+def test_member_joining_mid_season_gets_only_new_stars(mock_leaderboard, sample_leaderboard_data):
+    index = StarIndex(baseline=1701430000)
+    assert len(mock_leaderboard.check_for_new_stars(sample_leaderboard_data, index)) == 4
+    index.last_poll = 1701600000
+
+    # Joined with days 1-2 done, then earned day 3 after the last poll
+    sample_leaderboard_data["members"]["67890"] = {
+        "name": "Late Joiner", "stars": 5, "last_star_ts": 1701604800,
+        "completion_day_level": {
+            "1": {"1": {"get_star_ts": 1701433000}, "2": {"get_star_ts": 1701436000}},
+            "2": {"1": {"get_star_ts": 1701519000}, "2": {"get_star_ts": 1701523000}},
+            "3": {"1": {"get_star_ts": 1701604800}},
+        },
+    }
+    new_achievements = mock_leaderboard.check_for_new_stars(sample_leaderboard_data, index)
+    assert [(a["member_id"], a["day"], a["part"]) for a in new_achievements] == [("67890", 3, 1)]
+    assert len(index.announced_for("67890")) == 5
+    # All of the member's stars are reported as changed, for the history log
+    assert index.changed == {"67890"}
+
+def test_star_index_migrates_legacy_last_check(tmp_path):
+    legacy = tmp_path / "last_check.txt"
+    legacy.write_text("1701430000")
+    index = StarIndex.load(JsonStateStore(tmp_path), "star_index", legacy_path=legacy)
+    assert index.baseline == 1701430000
+
+def test_star_index_starts_over_for_a_new_year(tmp_path):
+    from model import unlock_ts
+
+    def member(ts):
+        return {"members": {"1": {"name": "Alice", "stars": 1, "last_star_ts": ts,
+                                  "completion_day_level": {"1": {"1": {"get_star_ts": ts}}}}}}
+
+    store = JsonStateStore(tmp_path)
+    index = StarIndex.load(store, "star_index", year=2024, leaderboard_id="1")
+    index.baseline = index.last_poll = 0
+    board_2024 = AoCLeaderboard("fake_token", "1", 2024)
+    assert len(board_2024.check_for_new_stars(member(unlock_ts(2024, 1) + 60), index)) == 1
+    index.last_poll = unlock_ts(2024, 2)  # As if last polled during the 2024 event
+    index.save(store, "star_index")
+
+    index = StarIndex.load(store, "star_index", year=2025, leaderboard_id="1")
+    assert index.announced == {}
+    board_2025 = AoCLeaderboard("fake_token", "1", 2025)
+    assert len(board_2025.check_for_new_stars(member(unlock_ts(2025, 1) + 60), index)) == 1
+
+def test_star_index_migrates_legacy_name_only_for_its_event(tmp_path):
+    from model import unlock_ts
+
+    store = JsonStateStore(tmp_path)
+    legacy = StarIndex(baseline=unlock_ts(2023, 3))
+    legacy.announced["1"] = {(1, 1)}
+    legacy.save(store, "star_index")
+
+    index = StarIndex.load(store, "star_index_2023_1", year=2023, leaderboard_id="1", legacy_name="star_index")
+    assert index.announced == {"1": {(1, 1)}}
+    assert (index.year, index.leaderboard_id) == (2023, "1")
+
+    index = StarIndex.load(store, "star_index_2024_1", year=2024, leaderboard_id="1", legacy_name="star_index")
+    assert index.announced == {}
+    assert index.baseline == legacy.last_poll
+
 def test_format_leaderboard(mock_leaderboard, sample_leaderboard_data):
     formatted = mock_leaderboard.format_leaderboard(sample_leaderboard_data)
     assert "Test User" in formatted
     assert "6⭐" in formatted
-    assert "Score: 100" in formatted 
\ No newline at end of file
+    assert "Score: 100" in formatted
+
+def test_format_page_fits_discord_and_covers_every_member(mock_leaderboard):
+    data = Leaderboard.from_json(generate_leaderboard(500, days=25))
+    mock_leaderboard._set_data(data)
+
+    first, page, page_count = mock_leaderboard.format_page(data, last_day=25)
+    assert page == 0 and page_count > 1
+    rows = 0
+    for number in range(page_count):
+        message, page, _ = mock_leaderboard.format_page(data, number, last_day=25)
+        assert page == number
+        assert len(message) <= DISCORD_MESSAGE_LIMIT
+        rows += message.count("⭐")
+    assert rows == len(mock_leaderboard.ranking(data)) == 500
+
+    # Out of range pages are clamped, and pages are served from the cache
+    assert mock_leaderboard.format_page(data, page_count + 5, last_day=25)[1] == page_count - 1
+    assert mock_leaderboard.format_page(data, 0, last_day=25)[0] is first
+    assert mock_leaderboard.stats["render_misses"] == page_count
+
+def test_format_page_top_window_and_around_member(mock_leaderboard):
+    data = Leaderboard.from_json(generate_leaderboard(200, days=25))
+    ranking = mock_leaderboard.ranking(data)
+
+    message, page, page_count = mock_leaderboard.format_page(data, first_day=20, last_day=22, top=5)
+    assert page_count == 1
+    assert message.count("⭐") == 5
+    assert "Days 20-22" in message
+
+    target = ranking[150]
+    message, page, _ = mock_leaderboard.format_page(data, last_day=25, member_id=target.id)
+    assert page > 0
+    assert f" 151 {target.name}" in message
+
+class StubAoC:
+    """Answers with the queued statuses or raw bodies first, then the leaderboard with an ETag"""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.queue = []
+        self.requests = []
+        self.etag = '"v1"'
+        self.url = None
+
+    async def handle(self, request):
+        from aiohttp import web
+
+        self.requests.append(request)
+        status = self.queue.pop(0) if self.queue else 200
+        if isinstance(status, bytes):
+            return web.Response(body=status, content_type="application/json")
+        if status == 302:
+            raise web.HTTPFound("/login")
+        if status != 200:
+            return web.Response(status=status)
+        if self.etag and request.headers.get("If-None-Match") == self.etag:
+            return web.Response(status=304)
+        headers = {"ETag": self.etag} if self.etag else {}
+        return web.json_response(self.payload, headers=headers)
+
+@pytest_asyncio.fixture
+async def aoc_server(sample_leaderboard_data):
+    """Local stand-in for adventofcode.com serving the sample leaderboard"""
+    from benchmarks.stub_server import start_stub_server
+
+    server = StubAoC(sample_leaderboard_data)
+    runner, server.url = await start_stub_server(server.handle)
+    yield server
+    await runner.cleanup()
+
+@pytest_asyncio.fixture
+async def served_leaderboard(mock_leaderboard, aoc_server, tmp_path):
+    mock_leaderboard.LEADERBOARD_URL = aoc_server.url
+    mock_leaderboard.store = JsonStateStore(tmp_path)
+    yield mock_leaderboard
+    await mock_leaderboard.close()
+
+@pytest.mark.asyncio
+async def test_fetch_data_uses_conditional_requests(served_leaderboard, sample_leaderboard_data):
+    first = await served_leaderboard.fetch_data(force_fresh=True)
+    second = await served_leaderboard.fetch_data(force_fresh=True)
+
+    assert first.members[0].name == "Test User"
+    assert second is first
+    assert served_leaderboard.stats["requests"] == 2
+    assert served_leaderboard.stats["not_modified"] == 1
+    assert served_leaderboard.stats["connections_reused"] == 1
+
+@pytest.mark.asyncio
+async def test_fetch_data_coalesces_concurrent_misses(served_leaderboard, aoc_server):
+    import asyncio
+
+    results = await asyncio.gather(*(served_leaderboard.fetch_data() for _ in range(5)))
+    assert all(result is results[0] for result in results)
+    assert len(aoc_server.requests) == 1
+    assert served_leaderboard.stats["cache_misses"] == 1
+    assert served_leaderboard.stats["cache_coalesced"] == 4
+
+    await served_leaderboard.fetch_data()
+    assert served_leaderboard.stats["cache_hits"] == 1
+    assert len(aoc_server.requests) == 1
+
+@pytest.mark.asyncio
+async def test_format_leaderboard_reuses_render_until_new_data(served_leaderboard):
+    data = await served_leaderboard.fetch_data()
+    first = served_leaderboard.format_leaderboard(data)
+    assert served_leaderboard.format_leaderboard(data) is first
+    assert served_leaderboard.stats["render_hits"] == 1
+    assert served_leaderboard.render_hit_rate == 0.5
+
+    served_leaderboard._etag = None  # Force a full 200 response
+    data = await served_leaderboard.fetch_data(force_fresh=True)
+    assert served_leaderboard.format_leaderboard(data) is not first
+    assert served_leaderboard.stats["render_misses"] == 2
+
+@pytest.mark.asyncio
+async def test_warm_start_reads_raw_payload_from_store(mock_leaderboard, sample_leaderboard_data, tmp_path):
+    store = JsonStateStore(tmp_path)
+    (tmp_path / "leaderboard_cache.json").write_bytes(json.dumps(sample_leaderboard_data).encode())
+    (tmp_path / "leaderboard_cache_meta.json").write_text(
+        json.dumps({"timestamp": datetime.now().timestamp(), "etag": '"v1"'})
+    )
+    mock_leaderboard.store = store
+
+    data = await mock_leaderboard.fetch_data()
+    assert data.members[0].name == "Test User"
+    assert mock_leaderboard.stats["cache_hits"] == 1
+    assert mock_leaderboard._etag == '"v1"'
+
+@pytest.mark.asyncio
+async def test_warm_start_reads_legacy_wrapped_cache(mock_leaderboard, sample_leaderboard_data, tmp_path):
+    (tmp_path / "leaderboard_cache.json").write_text(
+        json.dumps({"timestamp": 0, "data": sample_leaderboard_data})
+    )
+    mock_leaderboard.store = JsonStateStore(tmp_path)
+
+    data = await mock_leaderboard.read_cache()
+    assert data.members[0].stars == 6
+
+@pytest.mark.asyncio
+async def test_warm_start_uses_legacy_cache_only_for_its_event(sample_leaderboard_data, tmp_path):
+    (tmp_path / "leaderboard_cache.json").write_text(json.dumps(sample_leaderboard_data))
+    store = JsonStateStore(tmp_path)
+
+    same_event = AoCLeaderboard("fake_token", "1", 2023, "leaderboard_cache_2023_1",
+                                store=store, legacy_cache_name="leaderboard_cache")
+    assert (await same_event.read_cache()).members[0].name == "Test User"
+
+    next_event = AoCLeaderboard("fake_token", "1", 2024, "leaderboard_cache_2024_1",
+                                store=store, legacy_cache_name="leaderboard_cache")
+    assert await next_event.read_cache() is None
+
+@pytest.mark.asyncio
+async def test_fetch_data_stores_response_body_verbatim(served_leaderboard, tmp_path):
+    await served_leaderboard.fetch_data(force_fresh=True)
+    await served_leaderboard.store.flush()
+    cached = json.loads((tmp_path / "leaderboard_cache.json").read_bytes())
+    assert cached["members"]["12345"]["name"] == "Test User"
+
+@pytest_asyncio.fixture
+async def flaky_leaderboard(mock_leaderboard, aoc_server, tmp_path):
+    from resilience import RetryPolicy
+
+    mock_leaderboard.LEADERBOARD_URL = aoc_server.url
+    mock_leaderboard.store = JsonStateStore(tmp_path)
+    mock_leaderboard.retry = RetryPolicy(attempts=2, base_delay=0.01)
+    yield mock_leaderboard
+    await mock_leaderboard.close()
+
+@pytest.mark.asyncio
+async def test_fetch_retries_server_errors(flaky_leaderboard, aoc_server):
+    aoc_server.queue.extend([500, 503])
+    data = await flaky_leaderboard.fetch_data()
+    assert data.members[0].name == "Test User"
+    assert flaky_leaderboard.stats["retries"] == 2
+    assert not flaky_leaderboard.is_stale
+
+@pytest.mark.asyncio
+async def test_failing_fetches_serve_stale_data_and_open_the_circuit(flaky_leaderboard, aoc_server):
+    good = await flaky_leaderboard.fetch_data()
+
+    aoc_server.queue.extend([500] * 9)
+    for _ in range(3):
+        assert await flaky_leaderboard.fetch_data(force_fresh=True) is good
+    assert flaky_leaderboard.is_stale
+    assert flaky_leaderboard.breaker.state == "open"
+
+    # While open, AoC is not called at all
+    requests = len(aoc_server.requests)
+    assert await flaky_leaderboard.fetch_data(force_fresh=True) is good
+    assert len(aoc_server.requests) == requests
+    assert flaky_leaderboard.stats["circuit_open"] == 1
+
+@pytest.mark.asyncio
+async def test_malformed_payload_serves_last_good_data(flaky_leaderboard, aoc_server):
+    good = await flaky_leaderboard.fetch_data()
+
+    # Parses as JSON, but a star has no get_star_ts
+    malformed = {"members": {"1": {"name": "Broken", "stars": 1,
+                                   "completion_day_level": {"1": {"1": {}}}}}}
+    aoc_server.queue.append(json.dumps(malformed).encode())
+    assert await flaky_leaderboard.fetch_data(force_fresh=True) is good
+    assert flaky_leaderboard.is_stale
+    assert flaky_leaderboard.breaker.failures == 1
+
+@pytest.mark.asyncio
+async def test_malformed_cache_is_ignored_on_warm_start(mock_leaderboard, aoc_server, tmp_path):
+    (tmp_path / "leaderboard_cache.json").write_text(
+        '{"members": {"1": {"name": "Broken", "completion_day_level": {"1": {"1": {}}}}}}'
+    )
+    mock_leaderboard.LEADERBOARD_URL = aoc_server.url
+    mock_leaderboard.store = JsonStateStore(tmp_path)
+    try:
+        data = await mock_leaderboard.fetch_data()
+        assert data.members[0].name == "Test User"
+        assert await mock_leaderboard.fetch_data() is data
+    finally:
+        await mock_leaderboard.close()
+
+@pytest.mark.asyncio
+async def test_expired_session_is_not_retried(flaky_leaderboard, aoc_server):
+    from resilience import SessionExpiredError
+
+    aoc_server.queue.append(302)
+    assert await flaky_leaderboard.fetch_data() is None
+    assert isinstance(flaky_leaderboard.last_error, SessionExpiredError)
+    assert len(aoc_server.requests) == 1
+    assert flaky_leaderboard.breaker.state == "open"
+
+@pytest.mark.asyncio
+async def test_expired_data_is_served_while_revalidating(flaky_leaderboard, aoc_server):
+    import asyncio
+
+    first = await flaky_leaderboard.fetch_data()
+    flaky_leaderboard._fetched_at -= flaky_leaderboard.CACHE_TTL + 1
+    aoc_server.etag = None  # Answer the refresh with a full response
+
+    assert await flaky_leaderboard.fetch_data() is first
+    assert flaky_leaderboard.stats["cache_stale"] == 1
+    await asyncio.sleep(0.1)  # Let the background refresh finish
+    assert len(aoc_server.requests) == 2
+    assert await flaky_leaderboard.fetch_data() is not first
+    assert flaky_leaderboard.stats["cache_hits"] == 1
+
+def test_cli_renders_and_diffs_a_payload_offline(tmp_path, sample_leaderboard_data, capsys):
+    from leaderboard import main
+
+    payload = tmp_path / "payload.json"
+    payload.write_text(json.dumps(sample_leaderboard_data))
+
+    main(["render", "--file", str(payload), "--day", "3"])
+    assert "Test User" in capsys.readouterr().out
+
+    main(["diff", "--file", str(payload), "--since", "1701432000"])
+    assert capsys.readouterr().out.count("completed Day") == 3
+
+    with pytest.raises(SystemExit):
+        main(["render", "--state-dir", str(tmp_path)])
+
+def test_cli_renders_the_cache_the_bot_keeps(tmp_path, sample_leaderboard_data, capsys):
+    from leaderboard import cache_name_for, main
+
+    cache = tmp_path / f"{cache_name_for(2023, '123')}.json"
+    cache.write_text(json.dumps(sample_leaderboard_data))
+
+    # Days past the last one are clamped
+    main(["render", "--state-dir", str(tmp_path), "--year", "2023",
+          "--leaderboard-id", "123", "--day", "30"])
+    assert "Test User" in capsys.readouterr().out
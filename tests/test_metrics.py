@@ -0,0 +1,41 @@
+import asyncio
+import pytest
+from metrics import Histogram, Metrics
+
+def test_histogram_buckets_and_quantile():
+    histogram = Histogram(buckets=(0.01, 0.1, 1))
+    for value in (0.005, 0.05, 0.05, 0.5, 5):
+        histogram.observe(value)
+    assert histogram.counts == [1, 2, 1, 1]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(1.0) == float("inf")
+
+@pytest.mark.asyncio
+async def test_timed_records_sync_and_async_calls():
+    registry = Metrics()
+
+    @registry.timed("sync_seconds")
+    def render():
+        return "done"
+
+    @registry.timed("async_seconds")
+    async def fetch():
+        await asyncio.sleep(0)
+        return "fetched"
+
+    assert render() == "done"
+    assert await fetch() == "fetched"
+    assert registry.histograms["sync_seconds"].count == 1
+    assert registry.histograms["async_seconds"].count == 1
+
+def test_render_prometheus_includes_counters_collectors_and_histograms():
+    registry = Metrics()
+    registry.inc("requests_total", 3)
+    registry.observe("fetch_seconds", 0.2)
+    registry.add_collector(lambda: [("board_hits_total", {"board": "2024/1"}, 7)])
+
+    text = registry.render_prometheus()
+    assert "requests_total 3" in text
+    assert 'board_hits_total{board="2024/1"} 7' in text
+    assert 'fetch_seconds_bucket{le="0.25"} 1' in text
+    assert "fetch_seconds_count 1" in text
@@ -0,0 +1,36 @@
+import pytest
+from model import Leaderboard, as_model
+
+@pytest.fixture
+def raw_leaderboard():
+    return {
+        "members": {
+            "1": {
+                "name": None,
+                "stars": 3,
+                "local_score": 10,
+                "last_star_ts": 1701522000,
+                "completion_day_level": {
+                    "1": {"1": {"get_star_ts": 1701432000}, "2": {"get_star_ts": 1701435600}},
+                    "25": {"1": {"get_star_ts": 1703480000}},
+                },
+            },
+            "2": {"name": "Idle", "stars": 0, "local_score": 0, "completion_day_level": {}},
+        }
+    }
+
+def test_from_json_builds_dense_grid(raw_leaderboard):
+    leaderboard = Leaderboard.from_json(raw_leaderboard)
+    first, second = leaderboard.members
+
+    assert first.name == "Anonymous"
+    assert leaderboard.by_id["2"] is second
+    assert leaderboard.star_ts(first, 1, 2) == 1701435600
+    assert leaderboard.star_ts(first, 25, 1) == 1703480000
+    assert leaderboard.star_ts(first, 25, 2) == 0
+    assert len(leaderboard.member_timestamps(second)) == 50
+    assert not any(leaderboard.member_timestamps(second))
+
+def test_as_model_reuses_parsed_leaderboard(raw_leaderboard):
+    leaderboard = as_model(raw_leaderboard)
+    assert as_model(leaderboard) is leaderboard
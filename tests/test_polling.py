@@ -0,0 +1,30 @@
+from datetime import datetime
+from polling import AdaptivePollPolicy, MIN_INTERVAL, MAX_INTERVAL, UNLOCK_TZ
+
+def at(month, day, hour, minute=0):
+    return datetime(2024, month, day, hour, minute, tzinfo=UNLOCK_TZ)
+
+def test_fastest_rate_right_after_unlock():
+    policy = AdaptivePollPolicy()
+    assert policy.next_interval(changed=False, now=at(12, 5, 1)) == MIN_INTERVAL
+    assert "unlocked" in policy.reason
+
+def test_backs_off_exponentially_without_changes():
+    policy = AdaptivePollPolicy()
+    intervals = [policy.next_interval(changed=False, now=at(12, 5, 12)) for _ in range(4)]
+    assert intervals == [MIN_INTERVAL * 2, MIN_INTERVAL * 4, MAX_INTERVAL, MAX_INTERVAL]
+
+    assert policy.next_interval(changed=True, now=at(12, 5, 12)) == MIN_INTERVAL
+
+def test_backoff_never_sleeps_through_unlock():
+    policy = AdaptivePollPolicy()
+    policy.idle_polls = 10
+    assert policy.next_interval(changed=False, now=at(12, 5, 23, 30)) == 30 * 60
+
+def test_dormant_outside_advent():
+    policy = AdaptivePollPolicy()
+    assert policy.next_interval(changed=True, now=at(12, 27, 12)) == policy.dormant_interval
+    assert "dormant" in policy.reason
+
+    # Wakes up for the December 1st unlock
+    assert policy.next_interval(changed=False, now=at(11, 30, 23)) == 60 * 60
@@ -0,0 +1,37 @@
+from resilience import CircuitBreaker, RetryPolicy
+
+def test_retry_delays_grow_with_jitter_within_budget():
+    policy = RetryPolicy(attempts=5, base_delay=1.0, max_delay=4.0, budget=100.0)
+    for _ in range(50):
+        delays = list(policy.delays())
+        assert len(delays) == 5
+        assert all(0 <= delay <= min(4.0, 2 ** attempt) for attempt, delay in enumerate(delays))
+
+    # A tight budget cuts retries short
+    policy = RetryPolicy(attempts=10, base_delay=10.0, max_delay=10.0, budget=15.0)
+    assert sum(policy.delays()) <= 15.0
+
+def test_circuit_breaker_opens_then_lets_one_trial_through():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    now[0] = 61
+    assert breaker.state == "half-open" and breaker.allow()
+    # A failed trial opens the circuit again straight away
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 200
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+def test_circuit_breaker_trip_uses_its_own_cooldown():
+    now = [0.0]
+    breaker = CircuitBreaker(reset_timeout=60, clock=lambda: now[0])
+    breaker.trip(3600)
+    now[0] = 120
+    assert breaker.state == "open"
@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from scheduler import Board, PollFailed, PollScheduler
+
+class FakeLeaderboard:
+    def __init__(self, leaderboard_id):
+        self.leaderboard_id = leaderboard_id
+        self.year = 2024
+
+def make_boards(count):
+    return [Board(FakeLeaderboard(str(i)), i, None, None) for i in range(count)]
+
+@pytest.mark.asyncio
+async def test_run_round_isolates_failures_and_bounds_concurrency():
+    boards = make_boards(5)
+    polled = []
+    running = 0
+    peak = 0
+
+    async def poll(board):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if board is boards[1]:
+            raise RuntimeError("boom")
+        polled.append(board)
+
+    scheduler = PollScheduler(boards, poll, interval=900, max_concurrency=2)
+    await scheduler.run_round(stagger=False)
+
+    assert len(polled) == 4
+    assert boards[1].failures == 1
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_polls_without_fresh_data_count_as_failures():
+    boards = make_boards(1)
+    fresh = False
+
+    async def poll(board):
+        if not fresh:
+            raise PollFailed("no fresh leaderboard data")
+        return True
+
+    scheduler = PollScheduler(boards, poll, interval=900)
+    assert await scheduler.run_round(stagger=False) == [None]
+    assert await scheduler.run_round(stagger=False) == [None]
+    assert boards[0].failures == 2
+
+    fresh = True
+    assert await scheduler.run_round(stagger=False) == [True]
+    assert boards[0].failures == 0
+
+@pytest.mark.asyncio
+async def test_run_round_staggers_boards_across_interval():
+    boards = make_boards(3)
+    started = {}
+    loop = asyncio.get_running_loop()
+    begin = loop.time()
+
+    async def poll(board):
+        started[board.channel_id] = loop.time() - begin
+
+    scheduler = PollScheduler(boards, poll, interval=0.3, max_concurrency=3)
+    await scheduler.run_round()
+
+    assert started[0] < 0.05
+    assert 0.04 < started[1] < started[2]
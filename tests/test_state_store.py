@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from state_store import JsonStateStore, SQLiteStateStore, StateStore, atomic_write
+
+def test_atomic_write_replaces_file_without_leftovers(tmp_path):
+    path = tmp_path / "state.json"
+    atomic_write(str(path), b"old")
+    atomic_write(str(path), b"new")
+    assert path.read_bytes() == b"new"
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
+
+def test_failed_atomic_write_removes_its_temp_file(tmp_path, monkeypatch):
+    def fail(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr("os.replace", fail)
+    with pytest.raises(OSError):
+        atomic_write(str(tmp_path / "state.json"), b"data")
+    assert list(tmp_path.iterdir()) == []
+
+def test_corrupt_file_loads_default(tmp_path):
+    (tmp_path / "broken.json").write_text('{"trunc')
+    assert JsonStateStore(tmp_path).load("broken", default={}) == {}
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+async def test_rapid_saves_are_batched_into_one_write(tmp_path, backend):
+    if backend == "json":
+        store = JsonStateStore(tmp_path, write_delay=0.01)
+    else:
+        store = SQLiteStateStore(str(tmp_path / "state.sqlite3"), write_delay=0.01)
+
+    writes = []
+    original_write = store._write
+    store._write = lambda items: (writes.append(dict(items)), original_write(items))
+
+    for i in range(10):
+        store.save("counter", i)
+    assert await store.aload("counter") == 9
+
+    await asyncio.sleep(0.05)
+    assert writes == [{"counter": 9}]
+    assert store.load("counter") == 9
+    await store.close()
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_bytes_are_stored_verbatim(tmp_path, backend):
+    if backend == "json":
+        store = JsonStateStore(tmp_path)
+    else:
+        store = SQLiteStateStore(str(tmp_path / "state.sqlite3"))
+
+    store.save("payload", b'{"members": {}}')
+    assert store.load_bytes("payload") == b'{"members": {}}'
+    assert store.load_bytes("payload", parse=lambda view: len(view)) == 15
+    assert store.load_bytes("missing") is None
+
+def test_incomplete_backend_fails_when_created():
+    class ReadOnlyStore(StateStore):
+        def _read(self, name):
+            return None
+
+    with pytest.raises(TypeError):
+        ReadOnlyStore()
@@ -0,0 +1,55 @@
+import pytest
+from benchmarks.synthetic import generate_leaderboard
+from model import Leaderboard, unlock_ts
+from stats import LeaderboardStats, format_duration, np
+
+@pytest.fixture
+def leaderboard():
+    day1 = unlock_ts(2023, 1)
+    return Leaderboard.from_json({
+        "members": {
+            "1": {"name": "Alice", "stars": 2, "completion_day_level": {
+                "1": {"1": {"get_star_ts": day1 + 300}, "2": {"get_star_ts": day1 + 900}}}},
+            "2": {"name": "Bob", "stars": 1, "completion_day_level": {
+                "1": {"1": {"get_star_ts": day1 + 120}}}},
+            "3": {"name": "Carol", "stars": 0, "completion_day_level": {}},
+        }
+    })
+
+def test_ranks_solve_times_and_local_scores(leaderboard):
+    stats = LeaderboardStats(leaderboard, 2023, use_numpy=False)
+    alice, bob, carol = leaderboard.members
+
+    assert stats.rank(bob, 1, 1) == 1
+    assert stats.rank(alice, 1, 1) == 2
+    assert stats.rank(carol, 1, 1) == 0
+    assert stats.solve_time(alice, 1, 2) == 900
+    assert stats.part_gap(alice, 1) == 600
+    assert stats.part_gap(bob, 1) is None
+    # 3 members: part 1 gives 3 and 2 points, part 2 gives 3 points
+    assert stats.local_scores == [5, 3, 0]
+
+    assert [(member.name, rank) for member, *_, rank in stats.day_results(1)] == [("Alice", 1), ("Bob", 2)]
+    assert stats.fastest(1, part=1) == (bob, 120)
+    assert stats.fastest(2) is None
+    assert stats.standings() == [(alice, 5), (bob, 3)]
+
+def test_day_results_are_ranked_once_per_day(leaderboard):
+    stats = LeaderboardStats(leaderboard, 2023, use_numpy=False)
+    assert stats.day_results(1) is stats.day_results(1)
+    assert stats.day_results(2) == []
+
+@pytest.mark.skipif(np is None, reason="NumPy is not installed")
+def test_numpy_matches_pure_python():
+    leaderboard = Leaderboard.from_json(generate_leaderboard(200, completion=0.5))
+    vectorized = LeaderboardStats(leaderboard, 2023, use_numpy=True)
+    fallback = LeaderboardStats(leaderboard, 2023, use_numpy=False)
+
+    assert vectorized.ranks == fallback.ranks
+    assert vectorized.solve_times == fallback.solve_times
+    assert vectorized.local_scores == fallback.local_scores
+    assert vectorized.fastest_rows == fallback.fastest_rows
+
+def test_format_duration():
+    assert format_duration(65) == "1m05s"
+    assert format_duration(3723) == "1h02m03s"
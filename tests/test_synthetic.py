@@ -0,0 +1,26 @@
+from benchmarks.synthetic import add_star, generate_leaderboard, unlock_ts
+from model import Leaderboard
+
+def test_generate_leaderboard_shape():
+    payload = generate_leaderboard(50, completion=1.0, seed=1)
+    leaderboard = Leaderboard.from_json(payload)
+
+    assert len(leaderboard.members) == 50
+    for member in leaderboard.members:
+        assert member.stars == sum(1 for ts in leaderboard.member_timestamps(member) if ts)
+        # Every day has part 1, and no star is earned before its puzzle unlocks
+        for day in range(1, 26):
+            assert leaderboard.star_ts(member, day, 1) > unlock_ts(2023, day)
+
+def test_generate_leaderboard_is_deterministic_and_partial():
+    assert generate_leaderboard(20, completion=0.3) == generate_leaderboard(20, completion=0.3)
+    partial = Leaderboard.from_json(generate_leaderboard(200, completion=0.3))
+    assert sum(member.stars for member in partial.members) < 200 * 50 * 0.6
+
+def test_add_star_updates_fingerprint():
+    payload = generate_leaderboard(1, days=1, completion=1.0)
+    member_id, member = next(iter(payload["members"].items()))
+    stars = member["stars"]
+    add_star(payload, member_id, 2, 1, member["last_star_ts"] + 60)
+    assert member["stars"] == stars + 1
+    assert member["completion_day_level"]["2"]["1"]["get_star_ts"] == member["last_star_ts"]
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from leaderboard import AoCLeaderboard
+from star_index import StarIndex
+from state_store import JsonStateStore
+from user_links import UserLinks
+
+def test_links_are_indexed_both_ways_and_relinking_replaces_old_links(tmp_path):
+    links = UserLinks(JsonStateStore(tmp_path))
+    links.link("12345", 111)
+    assert links.discord_for("12345") == 111
+    assert links.aoc_for(111) == "12345"
+
+    # A Discord user can only be linked to one AoC member and vice versa
+    links.link("67890", 111)
+    assert links.discord_for("12345") is None
+    links.link("67890", 222)
+    assert links.aoc_for(111) is None
+    assert len(links) == 1
+
+    assert links.unlink(222) == "67890"
+    assert links.unlink(222) is None
+    assert len(links) == 0
+
+@pytest.mark.asyncio
+async def test_links_are_batched_and_survive_restart(tmp_path):
+    store = JsonStateStore(tmp_path)
+    links = UserLinks(store)
+    for i in range(10):
+        links.link(str(i), 1000 + i)
+    assert not (tmp_path / "user_links.json").exists()  # Not written on the loop
+    await store.close()
+
+    links = UserLinks(JsonStateStore(tmp_path))
+    assert len(links) == 10
+    assert links.aoc_for(1003) == "3"
+
+@pytest.mark.asyncio
+async def test_processes_sharing_state_keep_each_others_links(tmp_path):
+    lock_path = str(tmp_path / "bot.lock.links")
+    first = UserLinks(JsonStateStore(tmp_path), lock_path=lock_path)
+    second = UserLinks(JsonStateStore(tmp_path), lock_path=lock_path)
+
+    await asyncio.gather(first.alink("1", 101), second.alink("2", 202))
+    await first.alink("3", 303)
+    assert await second.aunlink(101) == "1"
+
+    links = UserLinks(JsonStateStore(tmp_path))
+    assert links.discord_for("2") == 202
+    assert links.discord_for("3") == 303
+    assert links.discord_for("1") is None
+
+def test_announcements_mention_linked_members(tmp_path):
+    data = {
+        "members": {
+            "1": {"name": "Linked", "stars": 1, "last_star_ts": 1701432000,
+                  "completion_day_level": {"1": {"1": {"get_star_ts": 1701432000}}}},
+            "2": {"name": "Unlinked", "stars": 1, "last_star_ts": 1701432000,
+                  "completion_day_level": {"1": {"1": {"get_star_ts": 1701432000}}}},
+        }
+    }
+    links = UserLinks(JsonStateStore(tmp_path))
+    links.link("1", 555)
+    leaderboard = AoCLeaderboard("fake_token", "123456", 2023)
+    messages = [
+        achievement["message"]
+        for achievement in leaderboard.check_for_new_stars(
+            data, StarIndex(baseline=0), mention=links.discord_for
+        )
+    ]
+    assert any("**Linked** (<@555>)" in message for message in messages)
+    assert any("**Unlinked** completed" in message for message in messages)
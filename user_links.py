@@ -0,0 +1,104 @@
+import logging
+
+logger = logging.getLogger("AoCBot")
+
+
+def _with_link(links, aoc_id, discord_id):
+    """Links with aoc_id linked to discord_id, dropping earlier links of either"""
+    links = {
+        aoc: discord for aoc, discord in links.items()
+        if aoc != aoc_id and int(discord) != discord_id
+    }
+    links[aoc_id] = discord_id
+    return links
+
+
+def _without_link(links, discord_id):
+    """Links without the one of discord_id"""
+    return {aoc: discord for aoc, discord in links.items() if int(discord) != discord_id}
+
+
+class UserLinks:
+    """Links between AoC member ids and Discord user ids
+
+    Both directions are indexed in memory, loaded once at startup, so
+    lookups while announcing are dict hits. Changes are saved through the
+    state store, which batches writes off the event loop.
+
+    When several bot processes share the state (lock_path is set), alink()
+    and aunlink() re-read the stored links and write the change straight
+    away under a file lock, so links made by other processes are kept.
+    """
+
+    def __init__(self, store, name="user_links", lock_path=None):
+        self.store = store
+        self.name = name
+        self.lock_path = lock_path
+        self._index(store.load(name, {}))
+
+    def _index(self, links):
+        self._by_aoc = {str(aoc_id): int(discord_id) for aoc_id, discord_id in links.items()}
+        self._by_discord = {discord_id: aoc_id for aoc_id, discord_id in self._by_aoc.items()}
+
+    async def areload(self):
+        """Re-read the links, picking up changes saved by other bot processes"""
+        self._index(await self.store.aload(self.name, {}))
+
+    def __len__(self):
+        return len(self._by_aoc)
+
+    def discord_for(self, aoc_id):
+        """Discord user id linked to an AoC member, or None"""
+        return self._by_aoc.get(str(aoc_id))
+
+    def aoc_for(self, discord_id):
+        """AoC member id linked to a Discord user, or None"""
+        return self._by_discord.get(int(discord_id))
+
+    def link(self, aoc_id, discord_id):
+        """Link an AoC member to a Discord user, replacing earlier links of either"""
+        aoc_id, discord_id = str(aoc_id), int(discord_id)
+        self._index(_with_link(self._by_aoc, aoc_id, discord_id))
+        self._save()
+        logger.info(f"🔗 Linked AoC member {aoc_id} to Discord user {discord_id}")
+
+    def unlink(self, discord_id):
+        """Remove a Discord user's link and return the AoC member id it had, if any"""
+        aoc_id = self._by_discord.get(int(discord_id))
+        if aoc_id is None:
+            return None
+        self._index(_without_link(self._by_aoc, int(discord_id)))
+        self._save()
+        logger.info(f"Unlinked AoC member {aoc_id} from Discord user {discord_id}")
+        return aoc_id
+
+    async def alink(self, aoc_id, discord_id):
+        """Like link, safe against other processes changing links at the same time"""
+        if self.lock_path is None:
+            return self.link(aoc_id, discord_id)
+        aoc_id, discord_id = str(aoc_id), int(discord_id)
+        self._index(await self.store.aupdate(
+            self.name, lambda links: _with_link(links, aoc_id, discord_id), {}, self.lock_path
+        ))
+        logger.info(f"🔗 Linked AoC member {aoc_id} to Discord user {discord_id}")
+
+    async def aunlink(self, discord_id):
+        """Like unlink, safe against other processes changing links at the same time"""
+        if self.lock_path is None:
+            return self.unlink(discord_id)
+        discord_id = int(discord_id)
+        removed = []
+
+        def change(links):
+            removed.extend(aoc for aoc, discord in links.items() if int(discord) == discord_id)
+            return _without_link(links, discord_id)
+
+        self._index(await self.store.aupdate(self.name, change, {}, self.lock_path))
+        if not removed:
+            return None
+        logger.info(f"Unlinked AoC member {removed[0]} from Discord user {discord_id}")
+        return removed[0]
+
+    def _save(self):
+        # Save a copy, the pending value is written from another thread
+        self.store.save(self.name, dict(self._by_aoc))